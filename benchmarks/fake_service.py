@@ -0,0 +1,296 @@
+#!/usr/bin/env python
+"""
+Fake `org.kde.ActivityManager` service
+
+Publish `/ActivityManager/Activities` on the session bus with a configurable
+number of activities and an injectable latency per call. Calls are counted
+and exposed by the `org.pytivity.Benchmark` interface of the same object.
+
+    $ python benchmarks/fake_service.py --activities 1000 --latency 1
+"""
+
+import sys
+import time
+import uuid
+import argparse
+
+from pydbus import SessionBus
+from pydbus.generic import signal
+from gi.repository import GLib
+
+ACTIVITIES_INTERFACE = """
+  <interface name="org.kde.ActivityManager.Activities">
+    <method name="CurrentActivity">
+      <arg direction="out" type="s"/>
+    </method>
+    <method name="SetCurrentActivity">
+      <arg direction="in" type="s" name="activity"/>
+      <arg direction="out" type="b"/>
+    </method>
+    <method name="AddActivity">
+      <arg direction="in" type="s" name="name"/>
+      <arg direction="out" type="s"/>
+    </method>
+    <method name="RemoveActivity">
+      <arg direction="in" type="s" name="activity"/>
+    </method>
+    <method name="StartActivity">
+      <arg direction="in" type="s" name="activity"/>
+    </method>
+    <method name="StopActivity">
+      <arg direction="in" type="s" name="activity"/>
+    </method>
+    <method name="ActivityState">
+      <arg direction="in" type="s" name="activity"/>
+      <arg direction="out" type="i"/>
+    </method>
+    <method name="ListActivities">
+      <arg direction="in" type="i" name="state"/>
+      <arg direction="out" type="as"/>
+    </method>
+    {bulk}
+    <method name="ActivityInformation">
+      <arg direction="in" type="s" name="activity"/>
+      <arg direction="out" type="(ssssi)"/>
+    </method>
+    <method name="ActivityName">
+      <arg direction="in" type="s" name="activity"/>
+      <arg direction="out" type="s"/>
+    </method>
+    <method name="SetActivityName">
+      <arg direction="in" type="s" name="activity"/>
+      <arg direction="in" type="s" name="name"/>
+    </method>
+    <method name="ActivityDescription">
+      <arg direction="in" type="s" name="activity"/>
+      <arg direction="out" type="s"/>
+    </method>
+    <method name="SetActivityDescription">
+      <arg direction="in" type="s" name="activity"/>
+      <arg direction="in" type="s" name="description"/>
+    </method>
+    <method name="ActivityIcon">
+      <arg direction="in" type="s" name="activity"/>
+      <arg direction="out" type="s"/>
+    </method>
+    <method name="SetActivityIcon">
+      <arg direction="in" type="s" name="activity"/>
+      <arg direction="in" type="s" name="icon"/>
+    </method>
+    <signal name="ActivityAdded">
+      <arg type="s" name="id"/>
+    </signal>
+    <signal name="ActivityRemoved">
+      <arg type="s" name="id"/>
+    </signal>
+    <signal name="ActivityChanged">
+      <arg type="s" name="id"/>
+    </signal>
+    <signal name="ActivityStateChanged">
+      <arg type="s" name="id"/>
+      <arg type="i" name="state"/>
+    </signal>
+    <signal name="CurrentActivityChanged">
+      <arg type="s" name="id"/>
+    </signal>
+  </interface>
+"""
+
+BULK_METHOD = """
+    <method name="ListActivitiesWithInformation">
+      <arg direction="out" type="a(ssssi)"/>
+    </method>
+"""
+
+BENCHMARK_INTERFACE = """
+  <interface name="org.pytivity.Benchmark">
+    <method name="CallCounts">
+      <arg direction="out" type="a{su}"/>
+    </method>
+    <method name="ResetCallCounts"/>
+  </interface>
+"""
+
+RUNNING = 2
+STOPPED = 4
+
+
+class FakeActivities(object):
+    """
+    Fake activity manager
+
+    Args:
+        count (int): Number of activities, half of them are running
+        latency (float): Seconds slept by every call
+        bulk (bool): Expose `ListActivitiesWithInformation`
+
+    Attributes:
+        node_info (str): Introspection data to publish the object with
+    """
+
+    def __init__(self, count, latency=0, bulk=True):
+        self.node_info = "<node>{}{}</node>".format(
+            ACTIVITIES_INTERFACE.format(bulk=BULK_METHOD if bulk else ""),
+            BENCHMARK_INTERFACE,
+        )
+        self.latency = latency
+        self.counts = {}
+        self.activities = {}
+        for i in range(count):
+            self._add("Activity {}".format(i), RUNNING if i % 2 == 0 else STOPPED)
+        self.current = next(iter(self.activities), "")
+
+    ActivityAdded = signal()
+    ActivityRemoved = signal()
+    ActivityChanged = signal()
+    ActivityStateChanged = signal()
+    CurrentActivityChanged = signal()
+
+    def CallCounts(self):
+        return self.counts
+
+    def ResetCallCounts(self):
+        self.counts = {}
+
+    def CurrentActivity(self):
+        self._call("CurrentActivity")
+        return self.current
+
+    def SetCurrentActivity(self, activity_id):
+        self._call("SetCurrentActivity")
+        if activity_id not in self.activities:
+            return False
+        if self.activities[activity_id]["state"] != RUNNING:
+            self._set_state(activity_id, RUNNING)
+        self.current = activity_id
+        self.CurrentActivityChanged(activity_id)
+        return True
+
+    def AddActivity(self, name):
+        self._call("AddActivity")
+        activity_id = self._add(name, STOPPED)
+        self.ActivityAdded(activity_id)
+        return activity_id
+
+    def RemoveActivity(self, activity_id):
+        self._call("RemoveActivity")
+        if self.activities.pop(activity_id, None) is not None:
+            self.ActivityRemoved(activity_id)
+
+    def StartActivity(self, activity_id):
+        self._call("StartActivity")
+        self._set_state(activity_id, RUNNING)
+
+    def StopActivity(self, activity_id):
+        self._call("StopActivity")
+        self._set_state(activity_id, STOPPED)
+
+    def ActivityState(self, activity_id):
+        self._call("ActivityState")
+        return self._get(activity_id)["state"]
+
+    def ListActivities(self, state):
+        self._call("ListActivities")
+        return [id_ for id_, info in self.activities.items() if info["state"] == state]
+
+    def ListActivitiesWithInformation(self):
+        self._call("ListActivitiesWithInformation")
+        return [self._information(id_) for id_ in self.activities]
+
+    def ActivityInformation(self, activity_id):
+        self._call("ActivityInformation")
+        return self._information(activity_id)
+
+    def ActivityName(self, activity_id):
+        self._call("ActivityName")
+        return self._get(activity_id)["name"]
+
+    def SetActivityName(self, activity_id, name):
+        self._call("SetActivityName")
+        self._set(activity_id, "name", name)
+
+    def ActivityDescription(self, activity_id):
+        self._call("ActivityDescription")
+        return self._get(activity_id)["description"]
+
+    def SetActivityDescription(self, activity_id, description):
+        self._call("SetActivityDescription")
+        self._set(activity_id, "description", description)
+
+    def ActivityIcon(self, activity_id):
+        self._call("ActivityIcon")
+        return self._get(activity_id)["icon"]
+
+    def SetActivityIcon(self, activity_id, icon):
+        self._call("SetActivityIcon")
+        self._set(activity_id, "icon", icon)
+
+    def _call(self, method):
+        self.counts[method] = self.counts.get(method, 0) + 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _add(self, name, state):
+        activity_id = str(uuid.uuid4())
+        self.activities[activity_id] = {
+            "name": name,
+            "description": "",
+            "icon": "",
+            "state": state,
+        }
+        return activity_id
+
+    def _get(self, activity_id):
+        return self.activities.get(
+            activity_id, {"name": "", "description": "", "icon": "", "state": 0}
+        )
+
+    def _set(self, activity_id, key, value):
+        if activity_id in self.activities:
+            self.activities[activity_id][key] = value
+            self.ActivityChanged(activity_id)
+
+    def _set_state(self, activity_id, state):
+        if activity_id in self.activities:
+            self.activities[activity_id]["state"] = state
+            self.ActivityStateChanged(activity_id, state)
+
+    def _information(self, activity_id):
+        info = self._get(activity_id)
+        return (
+            activity_id,
+            info["name"],
+            info["description"],
+            info["icon"],
+            info["state"],
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake KDE activity manager")
+    parser.add_argument("--activities", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0, help="milliseconds")
+    parser.add_argument(
+        "--no-bulk",
+        action="store_false",
+        dest="bulk",
+        help="do not expose ListActivitiesWithInformation",
+    )
+    args = parser.parse_args()
+
+    bus = SessionBus()
+    service = FakeActivities(args.activities, args.latency / 1000, bulk=args.bulk)
+    bus.publish(
+        "org.kde.ActivityManager",
+        ("/ActivityManager/Activities", service, service.node_info),
+    )
+    print("ready", flush=True)
+
+    try:
+        GLib.MainLoop().run()
+    except KeyboardInterrupt:
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
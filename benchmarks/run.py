@@ -0,0 +1,292 @@
+#!/usr/bin/env python
+"""
+Benchmarks of pytivity against a fake activity manager
+
+A private `dbus-daemon` is started with the fake service of
+`fake_service.py` for every activity count. Each scenario (`pytivity`
+commands or a `KActivity` operation) is timed and the D-Bus calls it makes
+are counted. Results are compared to `baseline.json`: more calls than the
+baseline or a wall time above the baseline plus the tolerance is a
+regression. The results of a configuration without baseline are recorded
+as its baseline, `--update` records all of them.
+
+    $ python benchmarks/run.py --activities 10,100,1000 --latency 1
+    $ python benchmarks/run.py --update  # store the results as the baseline
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+
+# Commands of each scenario, `{home}` is the directory of the fake session.
+# Scenarios creating an activity delete it so they can be repeated.
+CLI_SCENARIOS = {
+    "cli list": [["list"]],
+    "cli list -vvv": [["list", "-vvv"]],
+    "cli list -c": [["list", "-c"]],
+    "cli list -n": [["list", "-n", "Activity 1"]],
+    "cli activate": [["activate", "Activity 1"]],
+    "cli activate --stop": [["activate", "Activity 1", "--stop"]],
+    "cli start": [["start", "Activity 3"]],
+    "cli stop": [["stop", "Activity 3"]],
+    "cli update": [["update", "Activity 5", "-d", "benchmark"]],
+    "cli create/delete": [
+        ["create", "Benchmark", "-i", "icon", "--started", "true"],
+        ["delete", "Benchmark"],
+    ],
+    "cli apply/delete": [["apply", "{home}/spec.json"], ["delete", "Applied"]],
+    "cli export": [["export", "{home}/export.jsonl"]],
+    "cli import/delete": [["import", "{home}/import.jsonl"], ["delete", "Imported"]],
+}
+
+SPEC = [{"name": "Applied", "icon": "icon", "started": "true"}]
+
+ARCHIVE = {"name": "Imported", "icon": "icon", "state": "Stopped", "scripts": {}}
+
+
+def library_scenarios(bus, home):
+    from pytivity import kactivity
+
+    kactivity.KActivity.name_cache = False
+    kactivity._PATH = os.path.join(home, "data/kactivitymanagerd/activities")
+    kactivity._HOOK_INDEX = None
+
+    def resolve():
+        kactivity._NAME_INDEXES.clear()
+        kactivity.KActivity("Activity 1", bus=bus)
+
+    def attributes():
+        activity = kactivity.KActivity("Activity 1", bus=bus)
+        activity.refresh()
+        return activity.name, activity.description, activity.icon, activity.state
+
+    def create_delete():
+        activity = kactivity.KActivity.create(
+            "Benchmark", icon="icon", description="description", bus=bus
+        )
+        activity.delete()
+
+    return {
+        "KActivity.list_all": lambda: kactivity.KActivity.list_all(bus=bus),
+        "KActivity(name)": resolve,
+        "KActivity attributes": attributes,
+        "KActivity.create/delete": create_delete,
+    }
+
+
+class FakeSession(object):
+    """
+    Private session bus running the fake activity manager
+
+    Args:
+        activities (int): Number of activities
+        latency (float): Latency of every call in milliseconds
+        bulk (bool): Expose `ListActivitiesWithInformation`
+    """
+
+    def __init__(self, activities, latency=0, bulk=True):
+        self.home = tempfile.mkdtemp(prefix="pytivity-bench-")
+        self._daemon = subprocess.Popen(
+            ["dbus-daemon", "--session", "--nofork", "--print-address=1"],
+            stdout=subprocess.PIPE,
+            universal_newlines=True,
+        )
+        self._service = None
+        try:
+            self._start(activities, latency, bulk)
+        except BaseException:
+            self.close()
+            raise
+
+    def _start(self, activities, latency, bulk):
+        self.address = self._daemon.stdout.readline().strip()
+        self.env = dict(
+            os.environ,
+            DBUS_SESSION_BUS_ADDRESS=self.address,
+            XDG_CACHE_HOME=os.path.join(self.home, "cache"),
+            XDG_CONFIG_HOME=os.path.join(self.home, "config"),
+            XDG_DATA_HOME=os.path.join(self.home, "data"),
+            XDG_RUNTIME_DIR=self.home,
+            PYTHONPATH=ROOT,
+        )
+        os.makedirs(os.path.join(self.home, "data/kactivitymanagerd/activities"))
+        with open(os.path.join(self.home, "spec.json"), "w") as f:
+            json.dump(SPEC, f)
+        with open(os.path.join(self.home, "import.jsonl"), "w") as f:
+            f.write(json.dumps(ARCHIVE) + "\n")
+
+        command = [
+            sys.executable,
+            os.path.join(HERE, "fake_service.py"),
+            "--activities",
+            str(activities),
+            "--latency",
+            str(latency),
+        ]
+        if not bulk:
+            command.append("--no-bulk")
+        self._service = subprocess.Popen(
+            command, env=self.env, stdout=subprocess.PIPE, universal_newlines=True
+        )
+        self._service.stdout.readline()
+
+        import pydbus
+
+        self.bus = pydbus.connect(self.address)
+        self.activities = self.bus.get(
+            "org.kde.ActivityManager", "/ActivityManager/Activities"
+        )
+
+    def calls(self):
+        return sum(self.activities.CallCounts().values())
+
+    def measure(self, func, repeat):
+        """
+        Time a function and count its D-Bus calls
+
+        :param func: Function executing the scenario
+        :param repeat: Number of executions
+        :return: Tuple of the median wall time and the calls of one execution
+        """
+        walls = []
+        for _ in range(repeat):
+            self.activities.ResetCallCounts()
+            start = time.perf_counter()
+            func()
+            walls.append(time.perf_counter() - start)
+            calls = self.calls()
+        return statistics.median(walls), calls
+
+    def cli(self, commands):
+        for argv in commands:
+            argv = [argument.format(home=self.home) for argument in argv]
+            subprocess.run(
+                [sys.executable, "-m", "pytivity.cli", "--no-daemon"] + argv,
+                env=self.env,
+                stdout=subprocess.DEVNULL,
+                check=True,
+            )
+
+    def close(self):
+        if self._service is not None:
+            self._service.terminate()
+            self._service.wait()
+        self._daemon.terminate()
+        self._daemon.wait()
+        shutil.rmtree(self.home, ignore_errors=True)
+
+
+def run(activities, latency, repeat, bulk):
+    session = FakeSession(activities, latency, bulk)
+    results = {}
+    try:
+        for name, commands in CLI_SCENARIOS.items():
+            results[name] = session.measure(lambda: session.cli(commands), repeat)
+
+        scenarios = library_scenarios(session.activities, session.home)
+        for name, func in scenarios.items():
+            results[name] = session.measure(func, repeat)
+    finally:
+        session.close()
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """
+    Print the results and their regressions
+
+    :return: True if there is at least one regression
+    """
+    regression = False
+    for name, (wall, calls) in results.items():
+        reference = baseline.get(name)
+        status = ""
+        if reference:
+            if calls > reference["calls"]:
+                status += " calls regression ({})".format(reference["calls"])
+            if wall > reference["wall"] * (1 + tolerance):
+                status += " time regression ({:.1f} ms)".format(
+                    reference["wall"] * 1000
+                )
+        regression = regression or bool(status)
+        print(
+            "    {name:<26} {wall:>10.1f} ms {calls:>7} calls{status}".format(
+                name=name, wall=wall * 1000, calls=calls, status=status
+            )
+        )
+    return regression
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pytivity")
+    parser.add_argument(
+        "--activities",
+        default="10,100,1000",
+        help="comma separated activity counts (up to 10000)",
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0, help="latency of every call in ms"
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="runs per scenario")
+    parser.add_argument(
+        "--no-bulk",
+        action="store_false",
+        dest="bulk",
+        help="fake a daemon without ListActivitiesWithInformation",
+    )
+    parser.add_argument(
+        "--tolerance", type=float, default=0.5, help="allowed wall time increase"
+    )
+    parser.add_argument(
+        "--baseline", default=os.path.join(HERE, "baseline.json"), help="baseline file"
+    )
+    parser.add_argument(
+        "--update", action="store_true", help="store the results as the baseline"
+    )
+    args = parser.parse_args()
+
+    try:
+        with open(args.baseline) as f:
+            baselines = json.load(f)
+    except FileNotFoundError:
+        baselines = {}
+
+    regression = False
+    recorded = False
+    for count in [int(count) for count in args.activities.split(",")]:
+        key = "{} activities, {} ms, {}".format(
+            count, args.latency, "bulk" if args.bulk else "no bulk"
+        )
+        print(key)
+        results = run(count, args.latency, args.repeat, args.bulk)
+        if key in baselines:
+            regression |= compare(results, baselines[key], args.tolerance)
+        else:
+            compare(results, {}, args.tolerance)
+            print("    no baseline, results recorded as the baseline")
+            recorded = True
+        if args.update or key not in baselines:
+            baselines[key] = {
+                name: {"wall": wall, "calls": calls}
+                for name, (wall, calls) in results.items()
+            }
+
+    if args.update or recorded:
+        with open(args.baseline, "w") as f:
+            json.dump(baselines, f, indent=4, sort_keys=True)
+    if regression and not args.update:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python
+"""
+Startup time budget of the pytivity entry point
+
+Every scenario of `budget.json` runs `pytivity.cli.main()` with its `argv`
+in a fresh interpreter with `-X importtime`. A scenario fails when:
+
+- the command exits with a non-zero status
+- one of its `forbidden` modules is imported
+- its fastest wall time is above `max_factor` times the fastest wall time
+  of an empty interpreter, measured the same way
+
+Scenarios with `service` run against the fake activity manager of
+`fake_service.py` on a private bus (see `run.FakeSession`). They are
+skipped when `dbus-daemon` or PyGObject is not installed.
+
+    $ python benchmarks/startup.py [--runs N]
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import subprocess
+import importlib.util
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+
+CODE = "import sys; sys.argv = ['pytivity'] + {argv!r}; from pytivity.cli import main; main()"
+
+
+class Measure(object):
+    """
+    Fastest execution of a piece of code
+
+    Attributes:
+        wall (float): Fastest wall time in seconds
+        modules (set): Top level modules imported
+        status (int): Exit status, the first non-zero one
+        error (str): Standard error of the failed execution
+    """
+
+    def __init__(self):
+        self.wall = None
+        self.modules = set()
+        self.status = 0
+        self.error = ""
+
+
+def measure(code, runs, env=None):
+    """
+    Wall time and imports of a piece of code
+
+    :param code: Python code executed with `python -c`
+    :param runs: Number of executions, the fastest one is kept
+    :param env: Environment of the executions
+    :return: `Measure`
+    """
+    result = Measure()
+    for _ in range(runs):
+        start = time.perf_counter()
+        process = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            cwd=ROOT,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            universal_newlines=True,
+        )
+        wall = time.perf_counter() - start
+        result.wall = wall if result.wall is None else min(result.wall, wall)
+
+        errors = []
+        for line in process.stderr.splitlines():
+            if not line.startswith("import time:") or "|" not in line:
+                errors.append(line)
+                continue
+            _, cumulative, name = line[len("import time:") :].split("|")
+            if cumulative.strip().isdigit():
+                result.modules.add(name.strip().split(".")[0])
+
+        if process.returncode and not result.status:
+            result.status = process.returncode
+            result.error = "\n".join(errors)
+    return result
+
+
+def unavailable(scenario):
+    """
+    Reason why a scenario can not run here
+
+    :param scenario: Scenario of `budget.json`
+    :return: The reason or None
+    """
+    if not scenario.get("service"):
+        return None
+    if shutil.which("dbus-daemon") is None:
+        return "dbus-daemon is not installed"
+    for module in ("gi", "pydbus"):
+        if importlib.util.find_spec(module) is None:
+            return "the {} module is not installed".format(module)
+    return None
+
+
+def run_scenario(scenario, runs):
+    """
+    Measure a scenario of the budget
+
+    :param scenario: Scenario of `budget.json`
+    :param runs: Number of executions
+    :return: `Measure`
+    """
+    argv = ["--no-daemon"] + scenario["argv"]
+    code = CODE.format(argv=argv)
+    if not scenario.get("service"):
+        return measure(code, runs, dict(os.environ, PYTHONPATH=ROOT))
+
+    sys.path.insert(0, HERE)
+    try:
+        from run import FakeSession
+
+        session = FakeSession(10)
+    except Exception as e:
+        result = Measure()
+        result.status = 1
+        result.error = "Can not start the fake activity manager: {}".format(e)
+        return result
+
+    try:
+        return measure(code, runs, session.env)
+    finally:
+        session.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the pytivity startup budget")
+    parser.add_argument("--runs", type=int, default=5, help="executions per scenario")
+    parser.add_argument(
+        "--budget", default=os.path.join(HERE, "budget.json"), help="budget file"
+    )
+    args = parser.parse_args()
+
+    with open(args.budget) as f:
+        budget = json.load(f)
+
+    empty = measure("pass", args.runs).wall
+    print("{:<10} {:>8.1f} ms".format("empty", empty * 1000))
+
+    failed = False
+    for name, scenario in sorted(budget.items()):
+        reason = unavailable(scenario)
+        if reason is not None:
+            print("{:<10} skipped, {}".format(name, reason))
+            continue
+
+        result = run_scenario(scenario, args.runs)
+        forbidden = sorted(result.modules & set(scenario.get("forbidden", [])))
+        factor = result.wall / empty if result.wall else 0
+
+        problems = []
+        if result.status:
+            problems.append("exits with status {}".format(result.status))
+        if forbidden:
+            problems.append(
+                "imports forbidden modules: {}".format(", ".join(forbidden))
+            )
+        if factor > scenario["max_factor"]:
+            problems.append("slower than the budget")
+        failed = failed or bool(problems)
+
+        print(
+            "{name:<10} {wall:>8.1f} ms  x{factor:<5.1f} / x{budget:<5.1f} {status}".format(
+                name=name,
+                wall=(result.wall or 0) * 1000,
+                factor=factor,
+                budget=scenario["max_factor"],
+                status="FAILED" if problems else "ok",
+            )
+        )
+        for problem in problems:
+            print("    {}".format(problem))
+        if result.error:
+            print("    " + result.error.strip().replace("\n", "\n    "))
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
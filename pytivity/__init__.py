@@ -1 +1,16 @@
-from .kactivity import KActivity  # noQa
+def __getattr__(name):
+    # The public classes are imported on first use to keep the startup of the
+    # command line fast
+    if name == "ActivityRegistry":
+        from .registry import ActivityRegistry
+
+        return ActivityRegistry
+    if name == "ActivitySnapshot":
+        from .snapshot import ActivitySnapshot
+
+        return ActivitySnapshot
+    if name == "KActivity":
+        from .kactivity import KActivity
+
+        return KActivity
+    raise AttributeError("module {} has no attribute {}".format(__name__, name))
@@ -0,0 +1,363 @@
+import os
+import shutil
+import asyncio
+
+from dbus_next.aio import MessageBus
+
+from . import kactivity
+from .hooks import ACTIONS
+from .index import NameIndex
+
+SERVICE = "org.kde.ActivityManager"
+OBJECT_PATH = "/ActivityManager/Activities"
+INTERFACE = "org.kde.ActivityManager.Activities"
+
+
+async def activity_interface(bus=None):
+    """
+    Connect to the activity manager
+
+    :param bus: Connected `dbus_next.aio.MessageBus`, a new connection to the
+    session bus is opened if not provided
+    :return: Proxy interface to 'org.kde.ActivityManager
+    /ActivityManager/Activities'
+    """
+    if bus is None:
+        bus = await MessageBus().connect()
+
+    introspection = await bus.introspect(SERVICE, OBJECT_PATH)
+    proxy = bus.get_proxy_object(SERVICE, OBJECT_PATH, introspection)
+    return proxy.get_interface(INTERFACE)
+
+
+class AsyncKActivity(object):
+    """
+    A KDE activity using an asyncio D-Bus connection
+
+    This class is the asyncio counterpart of `KActivity`. Instances are
+    obtained with the `get`, `create` or `list_all` coroutines which fetch
+    all the attributes concurrently. Attributes are then read from the
+    object and modified with the `set_*` coroutines.
+
+    Note:
+        Requires the `dbus-next` package.
+
+        Use the `fetch` coroutine to refresh the attributes.
+
+    Args:
+        activity_id (str): ID of the activity
+        interface: Proxy interface returned by `activity_interface`
+
+    Attributes:
+        id (str): Id of the activity
+        name (str): Name of the activity
+        description (str): Description of the activity
+        icon (str): Icon of the activity
+        state (str): State of the activity (`Started` or `Stopped`)
+        activated (str): Command executed at activation of the activity
+        deactivated (str): Command executed at deactivation of the activity
+        started (str): Command executed at startup of the activity
+        stopped (str): Command executed at shutdown of the activity
+
+    """
+
+    def __init__(self, activity_id, interface):
+        self.id = activity_id
+        self._interface = interface
+
+        self.name = None
+        self.description = None
+        self.icon = None
+        self.state = None
+        self.activated = None
+        self.deactivated = None
+        self.started = None
+        self.stopped = None
+
+    async def fetch(self):
+        """
+        Fetch all the attributes concurrently
+
+        :return: None
+        """
+        (
+            self.name,
+            self.description,
+            self.icon,
+            state,
+        ) = await asyncio.gather(
+            self._interface.call_activity_name(self.id),
+            self._interface.call_activity_description(self.id),
+            self._interface.call_activity_icon(self.id),
+            self._interface.call_activity_state(self.id),
+        )
+        self.state = kactivity.ACTIVITY_STATE.get(state, state)
+        await self._fetch_scripts()
+
+    async def delete(self):
+        """
+        Delete the activity
+
+        :return: None
+        """
+        await self._interface.call_remove_activity(self.id)
+        await _run_in_executor(self._delete_directory)
+
+        index = kactivity._NAME_INDEXES.get(self._interface)
+        if index is not None:
+            index.remove(self.id)
+
+    async def activate(self):
+        """
+        Activate the activity
+
+        :return: None
+        """
+        await self._interface.call_set_current_activity(self.id)
+
+    async def start(self):
+        """
+        Start the activity
+
+        :return: None
+        """
+        await self._interface.call_start_activity(self.id)
+        self.state = kactivity.ACTIVITY_STATE[2]
+
+    async def stop(self):
+        """
+        Stop the activity
+
+        :return: None
+        """
+        await self._interface.call_stop_activity(self.id)
+        self.state = kactivity.ACTIVITY_STATE[4]
+
+    async def set_name(self, name):
+        await self._interface.call_set_activity_name(self.id, name)
+        self.name = name
+
+        index = kactivity._NAME_INDEXES.get(self._interface)
+        if index is not None:
+            index.rename(self.id, name)
+
+    async def set_description(self, description):
+        await self._interface.call_set_activity_description(self.id, description)
+        self.description = description
+
+    async def set_icon(self, icon):
+        await self._interface.call_set_activity_icon(self.id, icon)
+        self.icon = icon
+
+    async def set_activated(self, command):
+        await self._set_script("activated", command)
+
+    async def set_deactivated(self, command):
+        await self._set_script("deactivated", command)
+
+    async def set_started(self, command):
+        await self._set_script("started", command)
+
+    async def set_stopped(self, command):
+        await self._set_script("stopped", command)
+
+    async def _set_script(self, action, command):
+        if self.name is None:
+            self.name = await self._interface.call_activity_name(self.id)
+
+        await _run_in_executor(
+            kactivity._write_activity_scripts, self.id, self.name, {action: command}
+        )
+        setattr(self, action, command)
+
+    def _delete_directory(self):
+        path = os.path.join(kactivity._path(), self.id)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        kactivity._hook_index().invalidate(self.id)
+
+    async def _fetch_state(self):
+        state = await self._interface.call_activity_state(self.id)
+        self.state = kactivity.ACTIVITY_STATE.get(state, state)
+
+    async def _fetch_scripts(self):
+        (
+            self.activated,
+            self.deactivated,
+            self.started,
+            self.stopped,
+        ) = await _run_in_executor(self._read_activity_scripts)
+
+    def _read_activity_scripts(self):
+        return [
+            kactivity._read_activity_script(self.id, action, self.name)
+            for action in ACTIONS
+        ]
+
+    @classmethod
+    async def get(cls, id_or_name, interface=None):
+        """
+        Get an existing activity
+
+        :param id_or_name: Name or ID of the activity
+        :param interface: Proxy interface returned by `activity_interface`
+        :return: The activity
+        """
+        if interface is None:
+            interface = await activity_interface()
+
+        if len(id_or_name) != 36:
+            activity_id = await cls._find_id(id_or_name, interface)
+        else:
+            activity_id = id_or_name
+
+        activity = cls(activity_id, interface)
+        await activity.fetch()
+        return activity
+
+    @classmethod
+    async def list_all(cls, interface=None):
+        """
+        List the started and stopped activities
+
+        When the daemon supports it the name, description, icon and state of
+        every activity are fetched with a single `ListActivitiesWithInformation`
+        call. Otherwise the attributes of all the activities are fetched
+        concurrently.
+
+        :param interface: Proxy interface returned by `activity_interface`
+        :return: The list of activities, started activities first
+        """
+        if interface is None:
+            interface = await activity_interface()
+
+        if not hasattr(interface, "call_list_activities_with_information"):
+            ids = await asyncio.gather(
+                interface.call_list_activities(2), interface.call_list_activities(4)
+            )
+            activities = [
+                cls(activity_id, interface) for activity_id in ids[0] + ids[1]
+            ]
+            await asyncio.gather(*[activity.fetch() for activity in activities])
+            return activities
+
+        activities = {state: [] for state in kactivity.ACTIVITY_STATE}
+        for information in await interface.call_list_activities_with_information():
+            activity_id, name, description, icon, state = information
+            if state not in activities:
+                continue
+
+            activity = cls(activity_id, interface)
+            activity.name = name
+            activity.description = description
+            activity.icon = icon
+            activity.state = kactivity.ACTIVITY_STATE[state]
+            activities[state].append(activity)
+
+        activities = activities[2] + activities[4]
+        await asyncio.gather(*[activity._fetch_scripts() for activity in activities])
+        return activities
+
+    @classmethod
+    async def create(
+        cls,
+        name,
+        icon=None,
+        description=None,
+        activated=None,
+        deactivated=None,
+        started=None,
+        stopped=None,
+        interface=None,
+    ):
+        """
+        Create a new activity
+
+        The attributes are set concurrently once the activity is created.
+
+        :param name: Name of the activity
+        :param icon: Icon of the activity
+        :param description: Description of the activity
+        :param activated: Command executed at activation of the activity
+        :param deactivated: Command executed at deactivation of the activity
+        :param started: Command executed at startup of the activity
+        :param stopped: Command executed at shutdown of the activity
+        :param interface: Proxy interface returned by `activity_interface`
+        :return: The new activity
+        """
+        if interface is None:
+            interface = await activity_interface()
+
+        activity_id = await interface.call_add_activity(name)
+
+        index = kactivity._NAME_INDEXES.get(interface)
+        if index is not None:
+            index.add(name, activity_id)
+
+        activity = cls(activity_id, interface)
+        activity.name = name
+
+        commands = {
+            action: command
+            for action, command in zip(
+                ACTIONS, (activated, deactivated, started, stopped)
+            )
+            if command is not None
+        }
+        setters = [
+            _run_in_executor(
+                kactivity._write_activity_scripts,
+                activity_id,
+                name,
+                commands,
+                ACTIONS,
+            )
+        ]
+        if icon is not None:
+            setters.append(activity.set_icon(icon))
+        if description is not None:
+            setters.append(activity.set_description(description))
+        await asyncio.gather(activity._fetch_state(), *setters)
+
+        for action, command in commands.items():
+            setattr(activity, action, command)
+        return activity
+
+    @classmethod
+    async def _find_id(cls, name, interface):
+        index = kactivity._NAME_INDEXES.get(interface)
+        resolved = kactivity._match_name(index, name)
+        if resolved is None and (index is None or not index.fresh):
+            index = await _name_index(interface)
+            kactivity._NAME_INDEXES[interface] = index
+            resolved = index.resolve(name)
+
+        if resolved is None:
+            raise ValueError("No activity exist with the name: {}".format(name))
+        return index.get(resolved)
+
+
+async def _name_index(interface):
+    # Index of the names of the activities, without their other attributes
+    index = NameIndex()
+    if hasattr(interface, "call_list_activities_with_information"):
+        for information in await interface.call_list_activities_with_information():
+            activity_id, name, _, _, state = information
+            if state in kactivity.ACTIVITY_STATE:
+                index.add(name, activity_id)
+        return index
+
+    ids = await asyncio.gather(
+        *[interface.call_list_activities(state) for state in kactivity.ACTIVITY_STATE]
+    )
+    ids = [activity_id for state_ids in ids for activity_id in state_ids]
+    names = await asyncio.gather(
+        *[interface.call_activity_name(activity_id) for activity_id in ids]
+    )
+    for name, activity_id in zip(names, ids):
+        index.add(name, activity_id)
+    return index
+
+
+def _run_in_executor(func, *args):
+    return asyncio.get_running_loop().run_in_executor(None, func, *args)
@@ -0,0 +1,164 @@
+import os
+import json
+import collections
+
+from .hooks import ACTIONS
+from .kactivity import KActivity
+
+FIELDS = ("icon", "description", "activated", "deactivated", "started", "stopped")
+
+Change = collections.namedtuple("Change", ["action", "name", "activity", "fields"])
+Change.__doc__ = """
+Change needed to reach the desired state of an activity
+
+Attributes:
+    action (str): `create` or `update`
+    name (str): Name of the activity
+    activity (KActivity): The existing activity, None when created
+    fields (dict): Mapping of field name to (current value, desired value)
+"""
+
+
+def load_spec(path):
+    """
+    Load a declarative specification of activities
+
+    The specification is a JSON (or YAML if the file extension is `.yml` or
+    `.yaml`, requires PyYAML) list of activities, or a mapping with an
+    `activities` key holding that list. Each activity requires a `name` and
+    can set `icon`, `description`, `activated`, `deactivated`, `started` and
+    `stopped`. Omitted fields are left untouched, hook commands set to null
+    or an empty string are removed.
+
+    :param path: Path of the specification file
+    :return: List of activity specifications
+    :raise ValueError: The specification is invalid or PyYAML is missing
+    """
+    with open(path, "r") as f:
+        if os.path.splitext(path)[1] in (".yml", ".yaml"):
+            spec = _load_yaml(f)
+        else:
+            try:
+                spec = json.load(f)
+            except ValueError as e:
+                raise ValueError("Invalid specification: {}".format(e))
+
+    if isinstance(spec, dict):
+        spec = spec.get("activities", [])
+
+    if not isinstance(spec, list):
+        raise ValueError("Invalid specification: expected a list of activities")
+
+    for activity in spec:
+        if not isinstance(activity, dict) or not activity.get("name"):
+            raise ValueError("Invalid specification: every activity needs a name")
+        unknown = set(activity) - set(FIELDS) - {"name"}
+        if unknown:
+            raise ValueError(
+                "Invalid specification: unknown fields {}".format(
+                    ", ".join(sorted(unknown))
+                )
+            )
+    return spec
+
+
+def _load_yaml(f):
+    try:
+        import yaml
+    except ImportError:
+        raise ValueError("PyYAML is required to read YAML specifications")
+
+    try:
+        return yaml.safe_load(f)
+    except yaml.YAMLError as e:
+        raise ValueError("Invalid specification: {}".format(e))
+
+
+def plan(spec, activities):
+    """
+    Compute the changes needed to reach a specification
+
+    :param spec: List of activity specifications (see `load_spec`)
+    :param activities: Existing activities, as returned by `KActivity.list_all`
+    :return: List of `Change`
+    :raise ValueError: An activity is specified several times
+    """
+    names = collections.Counter(desired["name"] for desired in spec)
+    duplicates = sorted(name for name, count in names.items() if count > 1)
+    if duplicates:
+        raise ValueError(
+            "Invalid specification: activities specified several times: {}".format(
+                ", ".join(duplicates)
+            )
+        )
+
+    by_name = {}
+    for activity in activities:
+        by_name.setdefault(activity.name, activity)
+
+    changes = []
+    for desired in spec:
+        activity = by_name.get(desired["name"])
+        fields = {}
+        for field in FIELDS:
+            if field not in desired:
+                continue
+
+            value = desired[field] or ""
+            current = (getattr(activity, field) or "") if activity else ""
+            if value != current:
+                fields[field] = (current, value)
+
+        if activity is None:
+            changes.append(Change("create", desired["name"], None, fields))
+        elif fields:
+            changes.append(Change("update", desired["name"], activity, fields))
+    return changes
+
+
+def apply(changes, bus):
+    """
+    Apply a list of changes
+
+    :param changes: List of `Change` as returned by `plan`
+    :param bus: Proxy dbus object to 'org.kde.ActivityManager
+    /ActivityManager/Activities'
+    :return: None
+    """
+    for change in changes:
+        if change.action == "create":
+            KActivity.create(
+                change.name,
+                bus=bus,
+                **{field: new for field, (_, new) in change.fields.items()}
+            )
+        else:
+            commands = {}
+            for field, (_, new) in change.fields.items():
+                if field in ACTIONS:
+                    commands[field] = new
+                else:
+                    setattr(change.activity, field, new)
+            if commands:
+                change.activity.set_commands(**commands)
+
+
+def format_changes(changes):
+    """
+    Human readable description of a list of changes
+
+    :param changes: List of `Change`
+    :return: str
+    """
+    lines = []
+    for change in changes:
+        lines.append(
+            "{sign} {action} {name}".format(
+                sign="+" if change.action == "create" else "~",
+                action=change.action,
+                name=change.name,
+            )
+        )
+        for field, (current, new) in sorted(change.fields.items()):
+            lines.append("    {}: {!r} -> {!r}".format(field, current, new))
+    return "\n".join(lines)
@@ -0,0 +1,130 @@
+import os
+import gzip
+import json
+
+from . import kactivity
+from .hooks import ACTIONS, write_scripts
+
+
+def open_archive(path, mode):
+    """
+    Open an archive file
+
+    Archives are JSON lines files, gzip compressed when `path` ends with
+    `.gz`.
+
+    :param path: Path of the archive
+    :param mode: `r` or `w`
+    :return: Text file object
+    """
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def export_activities(activities, f):
+    """
+    Write activities and their hook scripts to an archive
+
+    One JSON object is written per activity, as soon as it is read.
+
+    :param activities: Iterable of activities
+    :param f: Text file object
+    :return: Number of exported activities
+    """
+    count = 0
+    for activity in activities:
+        record = {
+            "id": activity.id,
+            "name": activity.name,
+            "description": activity.description,
+            "icon": activity.icon,
+            "state": activity.state,
+            "scripts": _read_scripts(activity.id),
+        }
+        f.write(json.dumps(record) + "\n")
+        count += 1
+    return count
+
+
+def import_activities(f, bus, existing=()):
+    """
+    Create the activities of an archive
+
+    Activities are read one at a time, created with their exported state.
+    Activities whose name is in `existing` are skipped.
+
+    :param f: Text file object
+    :param bus: Proxy dbus object to 'org.kde.ActivityManager
+    /ActivityManager/Activities'
+    :param existing: Names of the existing activities
+    :return: Iterable of (name, id) tuples, id is None for skipped activities
+    :raise ValueError: A line of the archive is not a valid record, the
+    activities of the previous lines are imported
+    """
+    existing = set(existing)
+    for number, line in enumerate(f, 1):
+        if not line.strip():
+            continue
+
+        record = _parse_record(line, number)
+        if record["name"] in existing:
+            yield record["name"], None
+            continue
+
+        activity_id = bus.AddActivity(record["name"])
+        index = kactivity._NAME_INDEXES.get(bus)
+        if index is not None:
+            index.add(record["name"], activity_id)
+        if record.get("icon"):
+            bus.SetActivityIcon(activity_id, record["icon"])
+        if record.get("description"):
+            bus.SetActivityDescription(activity_id, record["description"])
+
+        _write_scripts(activity_id, record.get("scripts", {}))
+        if record.get("state") == kactivity.ACTIVITY_STATE[2]:
+            bus.StartActivity(activity_id)
+        elif record.get("state") == kactivity.ACTIVITY_STATE[4]:
+            bus.StopActivity(activity_id)
+
+        existing.add(record["name"])
+        yield record["name"], activity_id
+
+
+def _parse_record(line, number):
+    try:
+        record = json.loads(line)
+    except ValueError as e:
+        raise ValueError("Invalid record at line {}: {}".format(number, e))
+
+    if not isinstance(record, dict) or not isinstance(record.get("name"), str):
+        raise ValueError("Invalid record at line {}: no activity name".format(number))
+    if not isinstance(record.get("scripts", {}), dict):
+        raise ValueError("Invalid record at line {}: invalid scripts".format(number))
+    return record
+
+
+def _read_scripts(activity_id):
+    scripts = {}
+    for action in ACTIONS:
+        path = os.path.join(kactivity._path(), activity_id, action)
+        try:
+            entries = sorted(os.scandir(path), key=lambda entry: entry.name)
+        except OSError:
+            continue
+
+        for entry in entries:
+            if entry.is_file() and entry.name.endswith(".desktop"):
+                with open(entry.path, "r") as script:
+                    scripts.setdefault(action, {})[entry.name] = script.read()
+    return scripts
+
+
+def _write_scripts(activity_id, scripts):
+    if not scripts:
+        return
+
+    scripts = {action: files for action, files in scripts.items() if action in ACTIONS}
+    changed = write_scripts(kactivity._path(), activity_id, scripts, prepare=ACTIONS)
+    for action in changed:
+        kactivity._hook_index().invalidate(activity_id, action)
@@ -0,0 +1,234 @@
+from . import connection
+
+# State reported by the activity manager for unknown activities
+INVALID_STATE = 0
+
+_ESCAPES = {"s": " ", "t": "\t", "n": "\n", "r": "\r", "\\": "\\"}
+
+
+class FileBackend(object):
+    """
+    Read-only activity manager reading the kactivitymanagerd configuration
+
+    A backend is any object with the methods of the
+    'org.kde.ActivityManager /ActivityManager/Activities' D-Bus interface,
+    the pydbus proxy being the default one. This backend answers the reads
+    (`ListActivitiesWithInformation`, `ActivityName`, `CurrentActivity`...)
+    from `kactivitymanagerdrc`, parsed in a single read on first use, so
+    activities can be listed when kactivitymanagerd is slow or not running.
+    Writes and signals are delegated to the activity manager over D-Bus.
+
+    Note:
+        The configuration is written by kactivitymanagerd a few seconds
+        after a change, the states are the ones of its last write. Changes
+        made through the backend are not read back until `refresh` is
+        called.
+
+    Args:
+        path (str): Path of the configuration,
+            `$XDG_CONFIG_HOME/kactivitymanagerdrc` when None
+        bus: Proxy dbus object to 'org.kde.ActivityManager
+            /ActivityManager/Activities' receiving the writes, connected on
+            first write when None
+        address (str): Address of the bus of the writes, the session bus
+            when None
+
+    Attributes:
+        path (str): Path of the configuration
+    """
+
+    def __init__(self, path=None, bus=None, address=None):
+        if path is None:
+            from . import index
+
+            path = index.RC_PATH
+        self.path = path
+        self._bus = bus
+        self._address = address
+        self._activities = None
+        self._current = ""
+
+    def refresh(self):
+        """
+        Read the configuration again on next use
+
+        :return: None
+        """
+        self._activities = None
+
+    # The `timeout` arguments are accepted for compatibility with the pydbus
+    # proxies (see `Deadline`) and ignored
+
+    def ListActivitiesWithInformation(self, timeout=None):
+        return [
+            (activity_id,) + information
+            for activity_id, information in self._read().items()
+        ]
+
+    def ListActivities(self, state=None, timeout=None):
+        return [
+            activity_id
+            for activity_id, information in self._read().items()
+            if state is None or information[3] == state
+        ]
+
+    def ActivityName(self, activity_id, timeout=None):
+        return self._information(activity_id)[0]
+
+    def ActivityDescription(self, activity_id, timeout=None):
+        return self._information(activity_id)[1]
+
+    def ActivityIcon(self, activity_id, timeout=None):
+        return self._information(activity_id)[2]
+
+    def ActivityState(self, activity_id, timeout=None):
+        return self._information(activity_id)[3]
+
+    def CurrentActivity(self, timeout=None):
+        self._read()
+        return self._current
+
+    def __getattr__(self, attribute):
+        # Writes and signals go to the activity manager
+        if attribute.startswith("_"):
+            raise AttributeError(attribute)
+        if self._bus is None:
+            self._bus = connection.activity_bus(self._address)
+        return getattr(self._bus, attribute)
+
+    def __eq__(self, other):
+        # Backends of the same file share the caches keyed by bus
+        return isinstance(other, FileBackend) and other.path == self.path
+
+    def __hash__(self):
+        return hash((FileBackend, self.path))
+
+    def _information(self, activity_id):
+        return self._read().get(activity_id, ("", "", "", INVALID_STATE))
+
+    def _read(self):
+        if self._activities is None:
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    groups = parse(f.read())
+            except OSError as e:
+                raise ValueError(
+                    "Can not read the activity manager configuration: {}".format(e)
+                )
+            self._activities, self._current = _activities(groups)
+        return self._activities
+
+
+def parse(text):
+    """
+    Parse a KConfig file (e.g. `kactivitymanagerdrc`)
+
+    Localized entries (`key[fr]=...`) are skipped, the flags of the entries
+    (`key[$e]=...`) are ignored.
+
+    :param text: Content of the file
+    :return: Mapping of group name to the mapping of its entries
+    """
+    groups = {}
+    group = groups.setdefault("", {})
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("[") and line.endswith("]"):
+            group = groups.setdefault(line[1:-1], {})
+            continue
+
+        key, separator, value = line.partition("=")
+        if not separator:
+            continue
+        key = key.strip()
+        if key.endswith("]"):
+            key, _, flags = key[:-1].partition("[")
+            if not flags.startswith("$"):
+                continue
+        group[key.strip()] = _unescape(value.strip())
+    return groups
+
+
+def dbus(bus=None, address=None):
+    """
+    Activity manager over D-Bus, the default backend
+
+    :param bus: Proxy dbus object to 'org.kde.ActivityManager
+    /ActivityManager/Activities', returned as is
+    :param address: Address of the bus, the session bus when None
+    :return: Proxy object
+    """
+    if bus is None:
+        bus = connection.activity_bus(address)
+    return bus
+
+
+BACKENDS = {"dbus": dbus, "file": FileBackend}
+
+
+def backend(name, bus=None, address=None):
+    """
+    Activity manager backend usable as the `bus` of `KActivity`
+
+    :param name: Name of the backend in `BACKENDS`
+    :param bus: Proxy dbus object to 'org.kde.ActivityManager
+    /ActivityManager/Activities' used by the backend, created when needed
+    if None
+    :param address: Address of the bus, the session bus when None
+    :return: Backend object
+    """
+    try:
+        factory = BACKENDS[name]
+    except KeyError:
+        raise ValueError("Unknown backend: {}".format(name))
+    return factory(bus=bus, address=address)
+
+
+def _activities(groups):
+    names = groups.get("activities", {})
+    descriptions = groups.get("activities-descriptions", {})
+    icons = groups.get("activities-icons", {})
+    main = groups.get("main", {})
+
+    # Like kactivitymanagerd, every activity is running when the list of the
+    # running ones was never written
+    running = main.get("runningActivities")
+    running = set(names) if running is None else set(_list(running))
+
+    activities = {}
+    for activity_id, name in names.items():
+        activities[activity_id] = (
+            name,
+            descriptions.get(activity_id, ""),
+            icons.get(activity_id, ""),
+            2 if activity_id in running else 4,
+        )
+    return activities, main.get("currentActivity", "")
+
+
+def _list(value):
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def _unescape(value):
+    if "\\" not in value:
+        return value
+
+    characters = []
+    i = 0
+    while i < len(value):
+        character = value[i]
+        if character == "\\" and i + 1 < len(value):
+            escaped = value[i + 1]
+            if escaped == "x" and i + 4 <= len(value):
+                characters.append(chr(int(value[i + 2 : i + 4], 16)))
+                i += 4
+                continue
+            characters.append(_ESCAPES.get(escaped, escaped))
+            i += 2
+            continue
+        characters.append(character)
+        i += 1
+    return "".join(characters)
@@ -0,0 +1,159 @@
+import time
+
+PERCENTILES = (50, 95, 99)
+
+INTERVALS = ("call", "signal", "hooks", "total")
+
+
+def switch(bus, activities, rounds=10, executor=None, timeout=5.0):
+    """
+    Measure the latency of activity switches
+
+    Each round activates every activity in turn. For each switch are
+    recorded, from the `SetCurrentActivity` call:
+
+    - `call`: the return of the call
+    - `signal`: the reception of `CurrentActivityChanged`
+    - `hooks`: the end of the `deactivated` and `activated` hook commands
+      run by `executor`, from the reception of the signal
+    - `total`: the end of the hook commands, or the signal without executor
+
+    :param bus: Proxy dbus object to 'org.kde.ActivityManager
+    /ActivityManager/Activities'
+    :param activities: Ids of the activities, at least two
+    :param rounds: Number of times the activities are cycled through
+    :param executor: `HookExecutor` running the hook commands, None to only
+    measure the signal
+    :param timeout: Seconds to wait for the signal of a switch
+    :return: Mapping of interval name to the list of durations in seconds
+    """
+    if len(activities) < 2:
+        raise ValueError("At least two activities are needed to switch")
+
+    return _Switch(bus, executor, timeout).run(list(activities) * rounds)
+
+
+def percentile(durations, p):
+    """
+    Nearest-rank percentile
+
+    :param durations: List of durations
+    :param p: Percentile, between 0 and 100
+    :return: The duration or None if `durations` is empty
+    """
+    if not durations:
+        return None
+    ordered = sorted(durations)
+    rank = max(1, -(-len(ordered) * p // 100))
+    return ordered[int(rank) - 1]
+
+
+def format_results(results):
+    """
+    Table of the percentiles of the intervals in milliseconds
+
+    :param results: Result of `switch`
+    :return: str
+    """
+    titles = ["p{}".format(p) for p in PERCENTILES] + ["max"]
+    lines = [_row("", "count", ("{:>9}".format(title) for title in titles))]
+    for interval in INTERVALS:
+        durations = results.get(interval)
+        if not durations:
+            continue
+        values = [percentile(durations, p) for p in PERCENTILES] + [max(durations)]
+        lines.append(
+            _row(
+                interval,
+                len(durations),
+                ("{:>9.2f}".format(value * 1000) for value in values),
+            )
+        )
+    return "\n".join(lines)
+
+
+def summary(results):
+    """
+    Percentiles of the intervals
+
+    :param results: Result of `switch`
+    :return: Mapping of interval name to a mapping of `count`, `p50`, `p95`,
+    `p99` and `max` (in seconds)
+    """
+    data = {}
+    for interval, durations in results.items():
+        if durations:
+            data[interval] = {"count": len(durations), "max": max(durations)}
+            for p in PERCENTILES:
+                data[interval]["p{}".format(p)] = percentile(durations, p)
+    return data
+
+
+def _row(interval, count, values):
+    return "{:<8} {:>6} {}".format(interval, count, " ".join(values))
+
+
+class _Switch(object):
+    def __init__(self, bus, executor, timeout):
+        from gi.repository import GLib
+
+        self._glib = GLib
+        self._bus = bus
+        self._executor = executor
+        self._timeout = timeout
+        self._loop = GLib.MainLoop()
+        self._target = None
+        self._received = None
+
+    def run(self, activity_ids):
+        results = {interval: [] for interval in INTERVALS}
+        previous = self._bus.CurrentActivity()
+
+        subscription = self._bus.CurrentActivityChanged.connect(self._on_changed)
+        try:
+            for activity_id in activity_ids:
+                if activity_id == previous:
+                    continue
+                self._switch(previous, activity_id, results)
+                previous = activity_id
+        finally:
+            subscription.disconnect()
+        return results
+
+    def _switch(self, previous, activity_id, results):
+        self._target = activity_id
+        self._received = None
+
+        start = time.perf_counter()
+        self._bus.SetCurrentActivity(activity_id)
+        results["call"].append(time.perf_counter() - start)
+
+        if self._received is None:
+            timer = self._glib.timeout_add(int(self._timeout * 1000), self._expire)
+            self._loop.run()
+            if self._received is not None:
+                self._glib.source_remove(timer)
+        if self._received is None:
+            raise ValueError(
+                "No CurrentActivityChanged signal for {}".format(activity_id)
+            )
+        results["signal"].append(self._received - start)
+
+        end = self._received
+        if self._executor is not None:
+            futures = self._executor.run(previous, "deactivated")
+            futures += self._executor.run(activity_id, "activated")
+            for future in futures:
+                future.result()
+            end = time.perf_counter()
+            results["hooks"].append(end - self._received)
+        results["total"].append(end - start)
+
+    def _on_changed(self, activity_id):
+        if activity_id == self._target and self._received is None:
+            self._received = time.perf_counter()
+            self._loop.quit()
+
+    def _expire(self):
+        self._loop.quit()
+        return False
@@ -1,16 +1,225 @@
 #!/usr/bin/env python
 
-import time
+import os
+import sys
 import argparse
 
-from pydbus import SessionBus
-from terminaltables import AsciiTable
-
+from . import trace, kactivity
+from .hooks import ACTIONS
 from .__meta__ import METADATA
+from .deadline import Deadline, DeadlineExceeded, duration
 from .kactivity import KActivity
 
 
 def main():
+    main_parser = _build_parser()
+    args = main_parser.parse_args()
+
+    if args.version:
+        print(METADATA["version"])
+    elif args.complete_names:
+        complete_names()
+    elif args.func is daemon:
+        daemon(args)
+    elif args.func is completion:
+        completion(args, main_parser)
+    elif args.fleet and args.func in COMMANDS:
+        fleet(args)
+    elif args.func in COMMANDS or args.func in LOCAL_COMMANDS:
+        execute(args)
+    else:
+        main_parser.print_help()
+
+
+def fleet(args):
+    from . import fleet
+
+    try:
+        targets = [fleet.resolve(target) for target in args.fleet]
+    except ValueError as e:
+        print("Error: {}".format(e), file=sys.stderr)
+        sys.exit(1)
+    argv = fleet.strip_options(sys.argv[1:])
+
+    if args.func in (list_act, list_short):
+        _fleet_list(args, targets, argv)
+    else:
+        sys.exit(_fleet_command(args, targets, argv))
+
+
+def _fleet_list(args, targets, argv):
+    from . import fleet, output
+
+    if args.func is list_short:
+        argv = argv + ["list"]
+        columns = ["name", "state"]
+    else:
+        columns = _list_columns(args)
+
+    # The lists are always read as JSON lines then formatted here
+    argv = [argument for argument in argv if argument != "--raw"]
+    results = fleet.run(targets, argv + ["--format", "jsonl"], args.fleet_workers)
+    rows = fleet.list_rows(results, columns)
+
+    output_format = "jsonl" if args.fleet_json else getattr(args, "format", "table")
+    if getattr(args, "raw", False):
+        output.write(rows, ["bus"] + columns, "raw")
+    elif output_format == "table":
+        output.print_table(rows, ["bus"] + columns)
+    else:
+        output.write(rows, ["bus"] + columns, output_format)
+
+
+def _fleet_command(args, targets, argv):
+    import json
+
+    from . import fleet, output
+
+    statuses = [0]
+    results = fleet.run(targets, argv, args.fleet_workers)
+    if args.fleet_json:
+        for result in results:
+            statuses.append(result.status)
+            print(
+                json.dumps(
+                    {
+                        "bus": result.target.name,
+                        "status": result.status,
+                        "output": result.output,
+                    }
+                ),
+                flush=True,
+            )
+    else:
+        rows = []
+        for result in results:
+            statuses.append(result.status)
+            rows.append([result.target.name, str(result.status), result.output.strip()])
+        output.print_table(rows, ["bus", "status", "output"], title="Fleet")
+    return max(statuses)
+
+
+def execute(args):
+    if args.no_name_cache or getattr(args, "address", None):
+        # The cache holds the names of the session bus activities
+        KActivity.name_cache = False
+
+    deadline = _deadline(args)
+    trace_path = args.trace or os.environ.get("PYTIVITY_TRACE")
+    if trace_path:
+        # Calls forwarded to the daemon could not be traced
+        trace.enable()
+    elif _forwarded(args):
+        from .daemon import forward, DaemonError
+
+        try:
+            status = forward(sys.argv[1:], deadline=deadline)
+        except DeadlineExceeded as e:
+            _deadline_exceeded(e)
+        except DaemonError as e:
+            print("Error: {}".format(e), file=sys.stderr)
+            sys.exit(1)
+        if status is not None:
+            sys.exit(status)
+
+    try:
+        run(
+            args,
+            activity_bus=_activity_bus(args, deadline),
+            notification_bus=_notification_bus(args, deadline),
+            deadline=deadline,
+        )
+    finally:
+        if trace_path:
+            trace.report(trace_path)
+
+
+def run(args, activity_bus, notification_bus=None, deadline=None):
+    activity_bus = _backend(args, activity_bus)
+    if deadline is None:
+        deadline = _deadline(args)
+    if deadline is not None:
+        activity_bus = deadline.wrap(activity_bus, "ActivityManager")
+
+    try:
+        args.func(args, activity_bus=activity_bus, notification_bus=notification_bus)
+    except ValueError as e:
+        print(e)
+    except DeadlineExceeded as e:
+        _deadline_exceeded(e)
+    finally:
+        _flush_notifications(notification_bus)
+
+
+def _forwarded(args):
+    # The daemon sends the output back in one reply once the command is done,
+    # commands streaming large outputs are executed directly
+    if args.func not in COMMANDS or args.no_daemon or args.func is export_act:
+        return False
+    if args.func is list_act:
+        return args.format == "table" and not args.raw
+    return True
+
+
+def _deadline(args):
+    # Only the one-shot commands have a latency budget
+    if args.deadline is None or args.func not in COMMANDS:
+        return None
+    return Deadline(args.deadline)
+
+
+def _activity_bus(args, deadline):
+    from .connection import activity_bus
+
+    if getattr(args, "backend", "dbus") != "dbus":
+        # Other backends connect when they need the bus
+        return None
+
+    address = getattr(args, "address", None)
+    if deadline is None:
+        return activity_bus(address)
+    try:
+        return deadline.call("ActivityManager", activity_bus, address, retry=True)
+    except DeadlineExceeded as e:
+        _deadline_exceeded(e)
+
+
+def _backend(args, activity_bus):
+    name = getattr(args, "backend", "dbus")
+    if name == "dbus":
+        return activity_bus
+
+    from . import backends
+
+    return backends.backend(name, activity_bus, getattr(args, "address", None))
+
+
+def _notification_bus(args, deadline):
+    if not args.notification:
+        return None
+
+    from .connection import notification_bus
+
+    if deadline is None:
+        return notification_bus()
+
+    # A slow notification server gets half of the budget at most and only
+    # costs the notification
+    try:
+        return deadline.call(
+            "Notifications", notification_bus, limit=deadline.remaining() / 2
+        )
+    except DeadlineExceeded as e:
+        print("{}, no notification displayed".format(e), file=sys.stderr)
+        return None
+
+
+def _deadline_exceeded(error):
+    print("Error: {}".format(error), file=sys.stderr)
+    sys.exit(DEADLINE_STATUS)
+
+
+def _build_parser():
     main_parser = argparse.ArgumentParser(description=METADATA["description"])
     main_parser.set_defaults(func=list_short)
     main_parser.add_argument(
@@ -22,6 +231,50 @@ def main():
         action="store_true",
         help="display a system notification",
     )
+    main_parser.add_argument(
+        "--no-daemon",
+        action="store_true",
+        help="do not forward the command to a running pytivity daemon",
+    )
+    main_parser.add_argument(
+        "--no-name-cache",
+        action="store_true",
+        help="do not read or write the activity names cache, implied by --address",
+    )
+    main_parser.add_argument(
+        "--fleet",
+        action="append",
+        metavar="BUS",
+        help="execute the command on the session bus of a user runtime directory "
+        "(e.g. /run/user/1000) or a bus address, can be repeated",
+    )
+    main_parser.add_argument(
+        "--fleet-workers",
+        type=int,
+        default=8,
+        help="maximum number of buses handled at the same time",
+    )
+    main_parser.add_argument(
+        "--fleet-json",
+        action="store_true",
+        help="output the result of each bus as a JSON line",
+    )
+    main_parser.add_argument(
+        "--complete-names", action="store_true", help=argparse.SUPPRESS
+    )
+    main_parser.add_argument(
+        "--deadline",
+        type=duration,
+        metavar="DURATION",
+        help="latency budget of the command (e.g. 500ms or 2s): the D-Bus calls time out"
+        " when it is spent instead of after 25 seconds",
+    )
+    main_parser.add_argument(
+        "--trace",
+        metavar="FILE",
+        help="write a Chrome trace of the D-Bus calls and file I/O to FILE and print"
+        " a summary (also enabled by the PYTIVITY_TRACE environment variable)",
+    )
 
     subparsers = main_parser.add_subparsers(title="commands")
 
@@ -46,6 +299,123 @@ def main():
     activate_parser = subparsers.add_parser("activate", help="activate an activity")
     activate_parser.set_defaults(func=activate)
 
+    apply_parser = subparsers.add_parser(
+        "apply", help="create or update activities from a JSON or YAML specification"
+    )
+    apply_parser.set_defaults(func=apply_spec)
+    apply_parser.add_argument("spec", help="path of the specification file")
+    apply_parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="only display the changes to apply",
+        dest="dry_run",
+    )
+
+    export_parser = subparsers.add_parser(
+        "export", help="export the activities and their hook scripts"
+    )
+    export_parser.set_defaults(func=export_act)
+    export_parser.add_argument(
+        "file",
+        nargs="?",
+        default="-",
+        help="path of the archive (JSON lines, compressed if ending with .gz), "
+        "defaults to the standard output",
+    )
+
+    import_parser = subparsers.add_parser(
+        "import", help="import activities from an archive created by export"
+    )
+    import_parser.set_defaults(func=import_act)
+    import_parser.add_argument("file", help="path of the archive")
+
+    watch_parser = subparsers.add_parser(
+        "watch", help="execute the activities hook commands on activity changes"
+    )
+    watch_parser.set_defaults(func=watch)
+    watch_parser.add_argument(
+        "--path",
+        help="root of the hook scripts (<path>/<id>/<action>/*.desktop), "
+        "defaults to $XDG_CONFIG_HOME/pytivity/hooks",
+    )
+    watch_parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=4,
+        help="maximum number of commands running at the same time",
+    )
+    watch_parser.add_argument(
+        "-t",
+        "--timeout",
+        type=float,
+        default=30,
+        help="seconds after which a command is killed",
+    )
+    watch_parser.add_argument(
+        "--log", help="file receiving the JSON results, defaults to the standard output"
+    )
+
+    daemon_parser = subparsers.add_parser(
+        "daemon", help="run a daemon executing the commands of other pytivity calls"
+    )
+    daemon_parser.set_defaults(func=daemon)
+
+    completion_parser = subparsers.add_parser(
+        "completion", help="print the shell completion script"
+    )
+    completion_parser.set_defaults(func=completion)
+    completion_parser.add_argument("shell", choices=("bash", "zsh", "fish"))
+
+    events_parser = subparsers.add_parser(
+        "events",
+        help="print the activities then their changes as JSON lines until interrupted",
+    )
+    events_parser.set_defaults(func=events)
+
+    bench_parser = subparsers.add_parser("bench", help="measure pytivity latencies")
+    bench_subparsers = bench_parser.add_subparsers(title="benchmarks")
+    switch_parser = bench_subparsers.add_parser(
+        "switch", help="measure the latency of activity switches"
+    )
+    switch_parser.set_defaults(func=bench_switch)
+    switch_parser.add_argument(
+        "name",
+        nargs="*",
+        help="names or ids of the activities to cycle through, "
+        "defaults to the running activities",
+    )
+    switch_parser.add_argument(
+        "-r", "--rounds", type=int, default=10, help="number of cycles"
+    )
+    switch_parser.add_argument(
+        "--hooks",
+        help="root of the hook scripts run after each switch "
+        "(<path>/<id>/<action>/*.desktop), defaults to "
+        "$XDG_CONFIG_HOME/pytivity/hooks",
+    )
+    switch_parser.add_argument(
+        "--no-hooks",
+        action="store_false",
+        dest="run_hooks",
+        help="only measure the CurrentActivityChanged signal",
+    )
+    switch_parser.add_argument(
+        "-t",
+        "--timeout",
+        type=float,
+        default=5,
+        help="seconds to wait for the signal of a switch",
+    )
+    switch_parser.add_argument(
+        "--address",
+        help="address of the bus of the activity manager (e.g. of a fake service), "
+        "defaults to the session bus",
+    )
+    switch_parser.add_argument(
+        "--json", action="store_true", help="output the percentiles as JSON"
+    )
+
     create_parser.add_argument("name", help="name of the activity")
     create_parser.add_argument(
         "-d", "--description", help="description of the activity"
@@ -117,7 +487,7 @@ def main():
         const=False,
     )
 
-    delete_parser.add_argument("name", help="name or id  of the activity")
+    _add_selection_arguments(delete_parser, exact=True)
 
     list_parser.add_argument(
         "-v",
@@ -149,64 +519,114 @@ def main():
     list_parser.add_argument(
         "--raw", help="output non formatted data", action="store_true"
     )
+    list_parser.add_argument(
+        "-f",
+        "--format",
+        choices=("table", "jsonl", "csv", "tsv"),
+        default="table",
+        help="output format, rows are written as soon as they are read",
+    )
     list_parser.add_argument("-n", "--name", help="display only the named activity")
+    list_parser.add_argument(
+        "--backend",
+        choices=("dbus", "file"),
+        default="dbus",
+        help="read the activities from kactivitymanagerd (dbus) or from its"
+        " configuration file (file), without waiting for it",
+    )
 
-    start_parser.add_argument("name", help="name or id  of the activity")
+    _add_selection_arguments(start_parser)
 
-    stop_parser.add_argument("name", help="name or id  of the activity")
+    _add_selection_arguments(stop_parser, exact=True)
 
     activate_parser.add_argument("name", help="name or id  of the activity")
     activate_parser.add_argument(
         "-s", "--stop", action="store_true", help="Stop others activities", dest="stop"
     )
+    activate_parser.add_argument(
+        "-t",
+        "--timeout",
+        type=float,
+        default=5,
+        help="seconds to wait for the others activities to stop",
+    )
 
-    args = main_parser.parse_args()
+    return main_parser
 
-    if args.version:
-        print(METADATA["version"])
-    elif args.func in [
-        create,
-        delete,
-        list_act,
-        update,
-        start,
-        stop,
-        activate,
-        list_short,
-    ]:
-        bus = SessionBus()
-        activity_bus = bus.get("org.kde.ActivityManager", "/ActivityManager/Activities")
-
-        if args.notification:
-            notification_bus = bus.get(".Notifications")
-        else:
-            notification_bus = None
 
-        try:
-            args.func(
-                args, activity_bus=activity_bus, notification_bus=notification_bus
-            )
-        except ValueError as e:
-            print(e)
+def _add_selection_arguments(parser, exact=False):
+    parser.add_argument(
+        "name", nargs="*", help="names, ids or glob patterns of the activities"
+    )
+    if exact:
+        # A typo must not delete or stop another activity
+        parser.add_argument(
+            "--fuzzy",
+            action="store_true",
+            help="accept case-insensitive names, prefixes and abbreviations",
+        )
     else:
-        main_parser.print_help()
+        parser.set_defaults(fuzzy=True)
+    parser.add_argument(
+        "-r",
+        "--regex",
+        action="store_true",
+        help="names are regular expressions instead of glob patterns",
+    )
+    parser.add_argument(
+        "--all-except",
+        action="append",
+        default=[],
+        metavar="NAME",
+        help="select all the activities except this one (can be repeated)",
+        dest="all_except",
+    )
+    parser.add_argument(
+        "-t",
+        "--timeout",
+        type=float,
+        default=5,
+        help="seconds to wait for the activities to change",
+    )
 
 
-def create(args, activity_bus, notification_bus=None):
-    activity = KActivity.create(args.name, bus=activity_bus)
+def daemon(args):
+    from .daemon import serve
 
-    if args.icon:
-        activity.icon = args.icon
-    if args.description:
-        activity.description = args.description
-    if args.activated or args.activated is False:
-        activity.activated = args.activated
-    if args.deactivated or args.deactivated is False:
-        activity.deactivated = args.deactivated
-    if args.started or args.started is False:
-        activity.started = args.started
-    if args.stopped or args.stopped is False:
-        activity.stopped = args.stopped
+    serve(args)
+
+
+def completion(args, parser):
+    from .completion import script
+
+    commands = []
+    for action in parser._actions:
+        if isinstance(action, argparse._SubParsersAction):
+            commands.extend(action.choices)
+    print(script(args.shell, commands), end="")
+
+
+def complete_names():
+    # Names of the activities for the shell completion scripts
+    from . import index
+    from .connection import activity_bus
+
+    names = index.NameIndex.load()
+    if names is None or not index.is_cached():
+        names = index.NameIndex.from_activities(KActivity.list_all(activity_bus()))
+        names.save()
+    for name in sorted(names.names()):
+        print(name)
+
+
+def create(args, activity_bus, notification_bus=None):
+    activity = KActivity.create(
+        args.name,
+        icon=args.icon or None,
+        description=args.description or None,
+        bus=activity_bus,
+        **_commands(args)
+    )
 
     if notification_bus:
         _send_notification(
@@ -230,14 +650,10 @@ def update(args, activity_bus, notification_bus=None):
         activity.icon = args.icon
     if args.description:
         activity.description = args.description
-    if args.activated or args.activated is False:
-        activity.activated = args.activated
-    if args.deactivated or args.deactivated is False:
-        activity.deactivated = args.deactivated
-    if args.started or args.started is False:
-        activity.started = args.started
-    if args.stopped or args.stopped is False:
-        activity.stopped = args.stopped
+
+    commands = _commands(args)
+    if commands:
+        activity.set_commands(**commands)
 
     if notification_bus:
         _send_notification(
@@ -252,126 +668,249 @@ def update(args, activity_bus, notification_bus=None):
     )
 
 
-def delete(args, activity_bus, notification_bus=None):
-    activity = KActivity(args.name, bus=activity_bus)
-    activity.delete()
+def _commands(args):
+    # Hook commands given on the command line, False removes the script
+    commands = {}
+    for action in ACTIONS:
+        command = getattr(args, action)
+        if command or command is False:
+            commands[action] = command
+    return commands
 
-    if notification_bus:
-        _send_notification(
-            notification_bus,
-            "{} deleted !".format(activity.name),
-            activity.id,
-            activity.icon,
-        )
 
-    print(
-        "Activity ({name}) successfully deleted. ID: {id}".format(
-            name=activity.name, id=activity.id
-        )
+def delete(args, activity_bus, notification_bus=None):
+    from .transitions import transition
+
+    activities = _select_activities(args, activity_bus)
+    for activity in activities:
+        # Cache the name and icon needed once the activity is removed
+        activity.name
+        if notification_bus:
+            activity.icon
+
+    results = transition(
+        activity_bus,
+        activities,
+        "RemoveActivity",
+        signal="ActivityRemoved",
+        timeout=_signal_timeout(args, activity_bus),
     )
+    for activity in activities:
+        if results[activity.id] is None:
+            activity._forget()
+
+    _report_transition(activities, results, "deleted", notification_bus)
 
 
 def list_short(args, activity_bus, notification_bus=None):
     output = [["Name", "State"]]
-    activities = [
-        KActivity(activity_id, bus=activity_bus)
-        for activity_id in _list_activities(activity_bus=activity_bus)
-    ]
+    activities = _list_all(activity_bus)
 
     output += [[activity.name, activity.state] for activity in activities]
+
+    from terminaltables import AsciiTable
+
     table = AsciiTable(table_data=output, title="Activities")
     print(table.table)
 
 
 def list_act(args, activity_bus, notification_bus=None):
-    output = list()
+    from . import output
 
     if args.name:
         activities = [KActivity(args.name, bus=activity_bus)]
     else:
-        activities = [
-            KActivity(activity_id, bus=activity_bus)
-            for activity_id in _list_activities(activity_bus=activity_bus)
-        ]
-
-    header = _build_table_headers(args)
+        activities = _list_all(activity_bus)
 
-    for activity in activities:
-        if args.id or args.verbose > 2:
-            data = [activity.id, activity.name, activity.state]
-        else:
-            data = [activity.name, activity.state]
-
-        if args.commands or args.verbose > 0:
-            data += [
-                activity.activated,
-                activity.deactivated,
-                activity.started,
-                activity.stopped,
-            ]
-
-        if args.icon or args.verbose > 1:
-            data.append(activity.icon)
-        if args.description or args.verbose > 1:
-            data.append(activity.description)
-
-        output.append(data)
+    columns = _list_columns(args)
+    rows = output.rows(activities, columns)
 
     if args.raw:
-        for activity in output:
-            print(", ".join(activity))
+        output.write(rows, columns, "raw")
+    elif args.format == "table":
+        output.print_table(rows, columns)
     else:
-        output.insert(0, header)
-        table = AsciiTable(table_data=output, title="Activities")
-        print(table.table)
+        output.write(rows, columns, args.format)
 
 
-def _build_table_headers(args):
-    header = ["Name", "State"]
-    if args.id or args.verbose > 2:
-        header = ["ID"] + header
-    if args.commands or args.verbose > 0:
-        header += ["Cmd Activated", "Cmd Deactivated", "Cmd started", "Cmd stopped"]
-    if args.icon or args.verbose > 1:
-        header += ["Icon"]
-    if args.description or args.verbose > 1:
-        header += ["Description"]
+def apply_spec(args, activity_bus, notification_bus=None):
+    from . import apply
 
-    return header
+    try:
+        spec = apply.load_spec(args.spec)
+    except OSError as e:
+        raise ValueError("Can not read the specification: {}".format(e))
 
+    changes = apply.plan(spec, _list_all(activity_bus))
+    if not changes:
+        print("Activities are up to date")
+        return
 
-def start(args, activity_bus, notification_bus=None):
-    activity = KActivity(args.name, bus=activity_bus)
-    activity.start()
+    print(apply.format_changes(changes))
+    if args.dry_run:
+        return
+
+    apply.apply(changes, bus=activity_bus)
 
     if notification_bus:
         _send_notification(
             notification_bus,
-            "{} started !".format(activity.name),
-            activity.id,
-            activity.icon,
+            "Activities updated !",
+            "{} change(s) applied".format(len(changes)),
         )
 
-    print(
-        "Activity ({name}) started. ID: {id}".format(name=activity.name, id=activity.id)
-    )
+    print("{} change(s) applied".format(len(changes)))
 
 
-def stop(args, activity_bus, notification_bus=None):
-    activity = KActivity(args.name, bus=activity_bus)
-    activity.stop()
+def export_act(args, activity_bus, notification_bus=None):
+    from . import archive
+
+    activities = _list_all(activity_bus)
+    if args.file == "-":
+        archive.export_activities(activities, sys.stdout)
+        return
+
+    try:
+        with archive.open_archive(args.file, "w") as f:
+            count = archive.export_activities(activities, f)
+    except OSError as e:
+        raise ValueError("Can not write the archive: {}".format(e))
+
+    print("{} activities exported to {}".format(count, args.file))
+
+
+def import_act(args, activity_bus, notification_bus=None):
+    from . import archive
+
+    existing = [activity.name for activity in _list_all(activity_bus)]
+
+    count = 0
+    try:
+        with archive.open_archive(args.file, "r") as f:
+            for name, activity_id in archive.import_activities(
+                f, bus=activity_bus, existing=existing
+            ):
+                if activity_id is None:
+                    print("Activity ({name}) already exists, skipped".format(name=name))
+                else:
+                    count += 1
+                    print(
+                        "Activity ({name}) imported. ID: {id}".format(
+                            name=name, id=activity_id
+                        )
+                    )
+    except OSError as e:
+        raise ValueError("Can not read the archive: {}".format(e))
 
     if notification_bus:
         _send_notification(
             notification_bus,
-            "{} stopped !".format(activity.name),
-            activity.id,
-            activity.icon,
+            "Activities imported !",
+            "{} activities imported".format(count),
         )
 
-    print(
-        "Activity ({name}) stopped. ID: {id}".format(name=activity.name, id=activity.id)
+
+def watch(args, activity_bus, notification_bus=None):
+    from .watch import HookExecutor, default_path
+    from .watch import watch as watch_activities
+
+    log = open(args.log, "a") if args.log else sys.stdout
+    executor = HookExecutor(
+        args.path or default_path(),
+        workers=args.workers,
+        timeout=args.timeout,
+        log=log,
     )
+    try:
+        watch_activities(activity_bus, executor)
+    finally:
+        if args.log:
+            log.close()
+
+
+def events(args, activity_bus, notification_bus=None):
+    from .events import stream
+    from .registry import ActivityRegistry
+
+    stream(ActivityRegistry(bus=activity_bus))
+
+
+def bench_switch(args, activity_bus, notification_bus=None):
+    import json
+
+    from . import bench
+    from .watch import HookExecutor, default_path
+
+    if args.name:
+        activities = [KActivity(name, bus=activity_bus) for name in args.name]
+    else:
+        activities = [
+            activity
+            for activity in _list_all(activity_bus)
+            if activity.state == "Started"
+        ]
+
+    executor = None
+    if args.run_hooks:
+        executor = HookExecutor(args.hooks or default_path(), log=None)
+    try:
+        results = bench.switch(
+            activity_bus,
+            [activity.id for activity in activities],
+            rounds=args.rounds,
+            executor=executor,
+            timeout=args.timeout,
+        )
+    finally:
+        if executor is not None:
+            executor.close()
+
+    if args.json:
+        print(json.dumps(bench.summary(results), indent=4, sort_keys=True))
+    else:
+        print(bench.format_results(results))
+
+
+def _list_columns(args):
+    columns = ["name", "state"]
+    if args.id or args.verbose > 2:
+        columns = ["id"] + columns
+    if args.commands or args.verbose > 0:
+        columns += ["activated", "deactivated", "started", "stopped"]
+    if args.icon or args.verbose > 1:
+        columns += ["icon"]
+    if args.description or args.verbose > 1:
+        columns += ["description"]
+
+    return columns
+
+
+def start(args, activity_bus, notification_bus=None):
+    from .transitions import transition
+
+    activities = _select_activities(args, activity_bus)
+    results = transition(
+        activity_bus,
+        activities,
+        "StartActivity",
+        state=2,
+        timeout=_signal_timeout(args, activity_bus),
+    )
+    _report_transition(activities, results, "started", notification_bus)
+
+
+def stop(args, activity_bus, notification_bus=None):
+    from .transitions import transition
+
+    activities = _select_activities(args, activity_bus)
+    results = transition(
+        activity_bus,
+        activities,
+        "StopActivity",
+        state=4,
+        timeout=_signal_timeout(args, activity_bus),
+    )
+    _report_transition(activities, results, "stopped", notification_bus)
 
 
 def activate(args, activity_bus, notification_bus=None):
@@ -391,28 +930,129 @@ def activate(args, activity_bus, notification_bus=None):
             activity.id,
             activity.icon,
         )
+        # Displayed without waiting for the other activities to stop
+        _flush_notifications(notification_bus)
 
     if args.stop:
-        for id_ in activity_bus.ListActivities(2):
-            if id_ != activity.id:
-                time.sleep(0.2)
-                act = KActivity(id_)
-                act.stop()
-                print(
-                    "Activity ({name}) stopped. ID: {id}".format(
-                        name=act.name, id=act.id
-                    )
+        from .transitions import transition
+
+        others = [
+            act
+            for act in _list_all(activity_bus)
+            if act.id != activity.id and act.state == "Started"
+        ]
+        results = transition(
+            activity_bus,
+            others,
+            "StopActivity",
+            state=4,
+            timeout=_signal_timeout(args, activity_bus),
+        )
+        _report_transition(others, results, "stopped")
+
+
+def _list_all(activity_bus):
+    # Refresh the names cache, read by the shell completion, on the way
+    activities = KActivity.list_all(bus=activity_bus)
+    if KActivity.name_cache:
+        from . import index
+
+        if not index.is_cached():
+            names = index.NameIndex.from_activities(activities)
+            names.save()
+            kactivity._NAME_INDEXES.setdefault(activity_bus, names)
+    return activities
+
+
+def _signal_timeout(args, activity_bus):
+    # The wait for the signals of a transition is bounded by the deadline too
+    budget = getattr(activity_bus, "deadline", None)
+    if budget is None:
+        return args.timeout
+    return min(args.timeout, budget.remaining())
+
+
+def _select_activities(args, activity_bus):
+    from .transitions import select, is_pattern
+
+    if not args.name and not args.all_except:
+        raise ValueError("No activity given")
+
+    if args.regex or args.all_except or any(is_pattern(name) for name in args.name):
+        return select(
+            _list_all(activity_bus),
+            args.name,
+            regex=args.regex,
+            all_except=args.all_except,
+        )
+
+    activities = {}
+    for name in args.name:
+        activity = KActivity(name, bus=activity_bus, fuzzy=args.fuzzy)
+        activities.setdefault(activity.id, activity)
+    return list(activities.values())
+
+
+def _report_transition(activities, results, action, notification_bus=None):
+    for activity in activities:
+        error = results[activity.id]
+        if error:
+            print(
+                "Activity ({name}) not {action}: {error}. ID: {id}".format(
+                    name=activity.name, action=action, error=error, id=activity.id
                 )
+            )
+            continue
+
+        if notification_bus:
+            _send_notification(
+                notification_bus,
+                "{} {} !".format(activity.name, action),
+                activity.id,
+                activity.icon,
+                group=action,
+            )
+
+        print(
+            "Activity ({name}) {action}. ID: {id}".format(
+                name=activity.name, action=action, id=activity.id
+            )
+        )
+
+
+def _send_notification(notification_bus, title, body, icon=None, group=None):
+    # Queued, the notifications are sent once the command is done (see `run`)
+    # or its main action is (see `_flush_notifications`)
+    from .notify import notifier
+
+    notifier(notification_bus).notify(title, body, icon, group=group)
+
+
+def _flush_notifications(notification_bus):
+    if notification_bus:
+        from .notify import notifier
+
+        notifier(notification_bus).flush()
 
 
-def _list_activities(activity_bus):
-    return activity_bus.ListActivities(2) + activity_bus.ListActivities(4)
+COMMANDS = (
+    create,
+    delete,
+    list_act,
+    update,
+    start,
+    stop,
+    activate,
+    list_short,
+    apply_spec,
+    export_act,
+    import_act,
+)
 
+LOCAL_COMMANDS = (watch, events, bench_switch)
 
-def _send_notification(notification_bus, title, body, icon=None):
-    if not icon:
-        icon = "dialog-information"
-    notification_bus.Notify("Pytivity", 0, icon, title, body, [], {}, 2000)
+# Exit status of the commands which ran out of their deadline, as timeout(1)
+DEADLINE_STATUS = 124
 
 
 if __name__ == "__main__":
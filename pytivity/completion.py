@@ -0,0 +1,108 @@
+NAME_COMMANDS = ("activate", "start", "stop", "delete", "update")
+
+# The scripts read the names file written by `NameIndex.save` while it is
+# newer than the kactivitymanagerd configuration, otherwise they ask
+# `pytivity --complete-names` which refreshes it.
+
+BASH = r"""_pytivity_names() {
+    local cache="${XDG_CACHE_HOME:-$HOME/.cache}/pytivity/names.txt"
+    local rc="${XDG_CONFIG_HOME:-$HOME/.config}/kactivitymanagerdrc"
+    if [ -f "$cache" ] && ! [ "$rc" -nt "$cache" ]; then
+        cat "$cache"
+    else
+        pytivity --complete-names 2>/dev/null
+    fi
+}
+
+_pytivity() {
+    local cur="${COMP_WORDS[COMP_CWORD]}" command="" i
+    for ((i = 1; i < COMP_CWORD; i++)); do
+        if [[ "${COMP_WORDS[i]}" != -* ]]; then
+            command="${COMP_WORDS[i]}"
+            break
+        fi
+    done
+
+    case "$command" in
+        "")
+            COMPREPLY=($(compgen -W "@COMMANDS@" -- "$cur"))
+            ;;
+        @NAME_COMMANDS_CASE@)
+            if [[ "$cur" != -* ]]; then
+                local IFS=$'\n'
+                COMPREPLY=($(compgen -W "$(_pytivity_names)" -- "$cur"))
+                COMPREPLY=("${COMPREPLY[@]// /\\ }")
+            fi
+            ;;
+    esac
+}
+
+complete -F _pytivity pytivity
+"""
+
+ZSH = r"""#compdef pytivity
+
+_pytivity_names() {
+    local cache="${XDG_CACHE_HOME:-$HOME/.cache}/pytivity/names.txt"
+    local rc="${XDG_CONFIG_HOME:-$HOME/.config}/kactivitymanagerdrc"
+    if [[ -f "$cache" && ! "$rc" -nt "$cache" ]]; then
+        cat "$cache"
+    else
+        pytivity --complete-names 2>/dev/null
+    fi
+}
+
+_pytivity() {
+    local -a names
+    if (( CURRENT == 2 )); then
+        compadd -- @COMMANDS@
+        return
+    fi
+    case "$words[2]" in
+        @NAME_COMMANDS_CASE@)
+            names=("${(@f)$(_pytivity_names)}")
+            compadd -a names
+            ;;
+    esac
+}
+
+compdef _pytivity pytivity
+"""
+
+FISH = r"""function __pytivity_names
+    set -l cache $HOME/.cache
+    set -q XDG_CACHE_HOME; and set cache $XDG_CACHE_HOME
+    set -l rc $HOME/.config
+    set -q XDG_CONFIG_HOME; and set rc $XDG_CONFIG_HOME
+    set cache $cache/pytivity/names.txt
+    set rc $rc/kactivitymanagerdrc
+    if test -f $cache; and not command test $rc -nt $cache
+        cat $cache
+    else
+        pytivity --complete-names 2>/dev/null
+    end
+end
+
+complete -c pytivity -f
+complete -c pytivity -n __fish_use_subcommand -a "@COMMANDS@"
+complete -c pytivity -n "__fish_seen_subcommand_from @NAME_COMMANDS@" -a "(__pytivity_names)"
+"""
+
+SCRIPTS = {"bash": BASH, "zsh": ZSH, "fish": FISH}
+
+
+def script(shell, commands):
+    """
+    Completion script of a shell
+
+    :param shell: `bash`, `zsh` or `fish`
+    :param commands: Names of the pytivity commands
+    :return: str
+    """
+    names = [command for command in NAME_COMMANDS if command in commands]
+    return (
+        SCRIPTS[shell]
+        .replace("@COMMANDS@", " ".join(commands))
+        .replace("@NAME_COMMANDS_CASE@", "|".join(names))
+        .replace("@NAME_COMMANDS@", " ".join(names))
+    )
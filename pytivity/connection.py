@@ -0,0 +1,117 @@
+import threading
+
+from . import trace
+
+ACTIVITY_MANAGER = ("org.kde.ActivityManager", "/ActivityManager/Activities")
+NOTIFICATIONS = (".Notifications", None)
+
+
+class ConnectionManager(object):
+    """
+    Cache of the D-Bus connections and proxies
+
+    Connections are opened on first use and shared, proxies are introspected
+    once per connection, service and object path. Connections are identified
+    by their address, `None` being the session bus. All methods are thread
+    safe.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buses = {}
+        self._proxies = {}
+
+    def bus(self, address=None):
+        """
+        Connection to a bus
+
+        :param address: Address of the bus, the session bus when None
+        :return: `pydbus.bus.Bus`
+        """
+        with self._lock:
+            return self._bus(address)
+
+    def get(self, service, path=None, address=None, timeout=None):
+        """
+        Proxy to a D-Bus object
+
+        :param service: Bus name of the service
+        :param path: Object path, the default object of the service when None
+        :param address: Address of the bus, the session bus when None
+        :param timeout: Seconds to wait for the introspection of the object,
+        the D-Bus default when None
+        :return: Proxy object, wrapped by the tracer if tracing is enabled
+        """
+        key = (address, service, path)
+        with self._lock:
+            proxy = self._proxies.get(key)
+            if proxy is None:
+                bus = self._bus(address)
+                if path is None:
+                    proxy = bus.get(service, timeout=timeout)
+                else:
+                    proxy = bus.get(service, path, timeout=timeout)
+                proxy = trace.wrap(proxy, service.split(".")[-1])
+                self._proxies[key] = proxy
+        return proxy
+
+    def bus_of(self, proxy):
+        """
+        Connection of a proxy returned by `get`
+
+        :param proxy: Proxy object, or an object comparing equal to it (e.g. a
+        `DeadlineProxy`)
+        :return: `pydbus.bus.Bus` or None if the proxy is not cached
+        """
+        with self._lock:
+            for (address, _, _), cached in self._proxies.items():
+                if proxy == cached:
+                    return self._buses.get(address)
+        return None
+
+    def clear(self):
+        """
+        Forget the cached connections and proxies
+
+        :return: None
+        """
+        with self._lock:
+            self._buses.clear()
+            self._proxies.clear()
+
+    def _bus(self, address):
+        bus = self._buses.get(address)
+        if bus is None:
+            import pydbus
+
+            if address is None:
+                bus = pydbus.SessionBus()
+            else:
+                bus = pydbus.connect(address)
+            self._buses[address] = bus
+        return bus
+
+
+MANAGER = ConnectionManager()
+
+
+def activity_bus(address=None, timeout=None):
+    """
+    Shared proxy to 'org.kde.ActivityManager /ActivityManager/Activities'
+
+    :param address: Address of the bus, the session bus when None
+    :param timeout: Seconds to wait for the introspection of the proxy
+    :return: Proxy object
+    """
+    return MANAGER.get(*ACTIVITY_MANAGER, address=address, timeout=timeout)
+
+
+def notification_bus(address=None, timeout=None):
+    """
+    Shared proxy to the notifications service
+
+    :param address: Address of the bus, the session bus when None
+    :param timeout: Seconds to wait for the introspection of the proxy
+    :return: Proxy object
+    """
+    return MANAGER.get(*NOTIFICATIONS, address=address, timeout=timeout)
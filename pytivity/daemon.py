@@ -0,0 +1,227 @@
+import io
+import os
+import json
+import signal
+import socket
+import struct
+import tempfile
+import threading
+import contextlib
+import socketserver
+
+from .deadline import DeadlineExceeded, format_duration
+
+SOCKET_PATH = os.path.join(
+    os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir(),
+    "pytivity-{}.sock".format(os.getuid()),
+)
+
+# Seconds a client waits for the result of a command, and the daemon for a
+# request, without deadline
+TIMEOUT = 30.0
+
+
+def forward(argv, path=SOCKET_PATH, deadline=None):
+    """
+    Forward a command to a running daemon
+
+    The output of the command is printed and its exit status returned. Once
+    the command is sent it may have been executed by the daemon, a failure
+    to read its result is then an error rather than a reason to execute the
+    command again.
+
+    :param argv: Command line arguments
+    :param path: Path of the daemon socket
+    :param deadline: `Deadline` bounding the wait for the daemon, `TIMEOUT`
+    seconds when None
+    :return: Exit status of the command or None if the command was not
+    received by a daemon
+    :raise DaemonError: The result of the command could not be read
+    """
+    client = _connect(path, deadline)
+    if client is None:
+        return None
+
+    with client, client.makefile("rb") as f:
+        request = {"argv": argv, "cwd": os.getcwd()}
+        try:
+            client.sendall(json.dumps(request).encode() + b"\n")
+        except socket.timeout:
+            _timed_out(deadline)
+            return None
+        except OSError:
+            # The daemon only executes complete requests
+            return None
+
+        try:
+            response = json.loads(f.readline().decode())
+            status, output = response["status"], response["output"]
+        except socket.timeout:
+            _timed_out(deadline)
+            raise DaemonError(
+                "The pytivity daemon did not reply within {}".format(
+                    format_duration(TIMEOUT)
+                )
+            )
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            raise DaemonError("Invalid reply of the pytivity daemon: {}".format(e))
+
+    print(output, end="")
+    return status
+
+
+def _connect(path, deadline):
+    # Connection to the daemon of the current user, None if there is none
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.settimeout(
+        TIMEOUT if deadline is None else deadline.check("pytivity daemon")
+    )
+    try:
+        client.connect(path)
+    except socket.timeout:
+        client.close()
+        _timed_out(deadline)
+        return None
+    except OSError:
+        client.close()
+        return None
+
+    if _peer_uid(client, path) != os.getuid():
+        # The socket may be in a shared directory (/tmp), never send the
+        # command to another user
+        client.close()
+        return None
+    return client
+
+
+def _timed_out(deadline):
+    # A timeout of the socket is the end of the deadline if there is one
+    if deadline is not None:
+        raise DeadlineExceeded("pytivity daemon", deadline.seconds)
+
+
+class DaemonError(RuntimeError):
+    """
+    The result of a command forwarded to the daemon is unknown
+
+    Note:
+        The command may have been executed by the daemon.
+    """
+
+
+def serve(args, path=SOCKET_PATH):
+    """
+    Run the daemon
+
+    The daemon keeps the D-Bus connection and a live registry of the
+    activities (see `ActivityRegistry`) and executes the commands forwarded
+    by `forward` one at a time. It runs until interrupted.
+
+    :param args: Parsed command line arguments
+    :param path: Path of the daemon socket
+    :return: None
+    """
+    from gi.repository import GLib
+    from .registry import ActivityRegistry
+    from .connection import activity_bus, notification_bus
+
+    if is_running(path):
+        print("A pytivity daemon is already running ({})".format(path))
+        return
+
+    registry = ActivityRegistry(bus=activity_bus())
+
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(path)
+
+    server = _Server(path, activity_bus(), notification_bus())
+    os.chmod(path, 0o600)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    loop = GLib.MainLoop()
+    GLib.unix_signal_add(GLib.PRIORITY_DEFAULT, signal.SIGTERM, loop.quit)
+    GLib.unix_signal_add(GLib.PRIORITY_DEFAULT, signal.SIGINT, loop.quit)
+    try:
+        loop.run()
+    finally:
+        registry.close()
+        server.shutdown()
+        server.server_close()
+        os.remove(path)
+
+
+def is_running(path=SOCKET_PATH):
+    """
+    Check if a daemon is listening
+
+    :param path: Path of the daemon socket
+    :return: True if a daemon accepts connections
+    """
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(path)
+    except OSError:
+        return False
+    finally:
+        client.close()
+    return True
+
+
+def _peer_uid(connection, path):
+    # User of the process at the other end of a connection, the owner of the
+    # socket file where SO_PEERCRED is not available
+    option = getattr(socket, "SO_PEERCRED", None)
+    if option is None:
+        return os.stat(path).st_uid
+    credentials = connection.getsockopt(
+        socket.SOL_SOCKET, option, struct.calcsize("3i")
+    )
+    return struct.unpack("3i", credentials)[1]
+
+
+class _Server(socketserver.UnixStreamServer):
+    def __init__(self, path, activity_bus, notification_bus):
+        super().__init__(path, _Handler)
+        self.activity_bus = activity_bus
+        self.notification_bus = notification_bus
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    # The commands are executed one at a time, a silent client must not
+    # block the others
+    timeout = TIMEOUT
+
+    def handle(self):
+        from . import cli
+
+        if _peer_uid(self.connection, self.server.server_address) != os.getuid():
+            return
+
+        request = json.loads(self.rfile.readline().decode())
+        output = io.StringIO()
+        status = 0
+
+        with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+            try:
+                os.chdir(request.get("cwd", "/"))
+                args = cli._build_parser().parse_args(request["argv"])
+                if args.func in cli.COMMANDS:
+                    cli.run(
+                        args,
+                        activity_bus=self.server.activity_bus,
+                        notification_bus=(
+                            self.server.notification_bus if args.notification else None
+                        ),
+                    )
+                else:
+                    print("Command not supported by the daemon")
+                    status = 2
+            except SystemExit as e:
+                status = e.code if isinstance(e.code, int) else 1
+            except Exception as e:
+                print("Error: {}".format(e))
+                status = 1
+
+        response = {"status": status, "output": output.getvalue()}
+        self.wfile.write(json.dumps(response).encode() + b"\n")
@@ -0,0 +1,209 @@
+import re
+import time
+
+# Methods of the activity manager without side effects, retried when they
+# time out
+READS = frozenset(
+    (
+        "ActivityDescription",
+        "ActivityIcon",
+        "ActivityInformation",
+        "ActivityName",
+        "ActivityState",
+        "CurrentActivity",
+        "ListActivities",
+        "ListActivitiesWithInformation",
+    )
+)
+
+RETRIES = 2
+
+# D-Bus errors of a call which did not get a reply in time
+TIMEOUT_ERRORS = (
+    "org.freedesktop.DBus.Error.NoReply",
+    "org.freedesktop.DBus.Error.Timeout",
+)
+
+UNITS = {"ms": 0.001, "s": 1.0, "": 1.0}
+
+_DURATION = re.compile(r"^(\d+(?:\.\d*)?|\.\d+)\s*(ms|s|)$")
+
+
+class DeadlineExceeded(TimeoutError):
+    """
+    An operation did not complete within the latency budget
+
+    Args:
+        operation (str): Name of the operation (e.g. a D-Bus method)
+        seconds (float): Budget of the invocation
+    """
+
+    def __init__(self, operation, seconds):
+        super().__init__(
+            "{} did not complete within the {} deadline".format(
+                operation, format_duration(seconds)
+            )
+        )
+        self.operation = operation
+        self.seconds = seconds
+
+
+class Deadline(object):
+    """
+    Latency budget of an invocation
+
+    Every D-Bus call made through `call` or a proxy returned by `wrap` gets
+    the remaining budget as its timeout, instead of the 25 seconds default of
+    D-Bus. Reads (`READS`) which time out are retried up to `retries` times,
+    each attempt getting a share of the remaining budget. Once the budget is
+    spent the calls fail with `DeadlineExceeded` without reaching the bus.
+
+    Args:
+        seconds (float): Budget, counted from the creation of the deadline
+        retries (int): Number of retries of the reads
+
+    Attributes:
+        seconds (float): Budget of the invocation
+        retries (int): Number of retries of the reads
+    """
+
+    def __init__(self, seconds, retries=RETRIES):
+        self.seconds = seconds
+        self.retries = retries
+        self._end = time.monotonic() + seconds
+
+    def remaining(self):
+        """
+        Seconds left in the budget
+
+        :return: float, 0 when the budget is spent
+        """
+        return max(0.0, self._end - time.monotonic())
+
+    def check(self, operation):
+        """
+        Seconds left in the budget, failing if it is spent
+
+        :param operation: Name of the operation reported by the error
+        :return: float
+        """
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded(operation, self.seconds)
+        return remaining
+
+    def call(self, operation, function, *args, retry=False, limit=None, **kwargs):
+        """
+        Call a pydbus function accepting a `timeout` keyword argument (proxy
+        methods, `Bus.get`) within the remaining budget
+
+        :param operation: Name of the operation reported by the error
+        :param function: Function to call
+        :param args: Positional arguments of the function
+        :param retry: Retry the call when it times out
+        :param limit: Maximum seconds given to the call, all the remaining
+        budget when None
+        :param kwargs: Keyword arguments of the function
+        :return: Result of the function
+        """
+        from gi.repository import GLib
+
+        attempts = self.retries + 1 if retry else 1
+        for attempt in range(attempts, 0, -1):
+            timeout = self.check(operation) / attempt
+            if limit is not None:
+                timeout = min(timeout, limit)
+            try:
+                return function(*args, timeout=timeout, **kwargs)
+            except GLib.Error as e:
+                if not _is_timeout(e):
+                    raise
+        raise DeadlineExceeded(operation, self.seconds)
+
+    def wrap(self, proxy, name):
+        """
+        Wrap a D-Bus proxy so its method calls are bounded by the deadline
+
+        :param proxy: pydbus proxy object
+        :param name: Name of the proxy, prefixed to the method names in errors
+        :return: `DeadlineProxy`
+        """
+        return DeadlineProxy(proxy, name, self)
+
+
+class DeadlineProxy(object):
+    """
+    D-Bus proxy whose method calls are bounded by a `Deadline`
+
+    The proxy compares and hashes as the proxy it wraps, so the caches keyed
+    by proxy (e.g. the name indexes) are shared with it.
+
+    Args:
+        proxy: pydbus proxy object
+        name (str): Name of the proxy
+        deadline (Deadline): Budget of the calls
+
+    Attributes:
+        deadline (Deadline): Budget of the calls
+    """
+
+    def __init__(self, proxy, name, deadline):
+        self._proxy = proxy
+        self._name = name
+        self.deadline = deadline
+
+    def __getattr__(self, attribute):
+        value = getattr(self._proxy, attribute)
+        if not callable(value) or hasattr(value, "connect"):
+            return value
+
+        operation = "{}.{}".format(self._name, attribute)
+        retry = attribute in READS
+        deadline = self.deadline
+
+        def bounded(*args):
+            return deadline.call(operation, value, *args, retry=retry)
+
+        setattr(self, attribute, bounded)
+        return bounded
+
+    def __eq__(self, other):
+        if isinstance(other, DeadlineProxy):
+            other = other._proxy
+        return self._proxy == other
+
+    def __hash__(self):
+        return hash(self._proxy)
+
+
+def duration(value):
+    """
+    Parse a duration such as `500ms`, `2s` or `1.5` (seconds)
+
+    :param value: Duration
+    :return: Seconds
+    """
+    match = _DURATION.match(value.strip())
+    if match is None or float(match.group(1)) <= 0:
+        raise ValueError("Invalid duration: {}".format(value))
+    return float(match.group(1)) * UNITS[match.group(2)]
+
+
+def format_duration(seconds):
+    """
+    Human readable duration
+
+    :param seconds: Duration in seconds
+    :return: str
+    """
+    if seconds < 1:
+        return "{:g}ms".format(round(seconds * 1000, 3))
+    return "{:g}s".format(seconds)
+
+
+def _is_timeout(error):
+    from gi.repository import Gio
+
+    if error.matches(Gio.io_error_quark(), Gio.IOErrorEnum.TIMED_OUT):
+        return True
+    return Gio.DBusError.get_remote_error(error) in TIMEOUT_ERRORS
@@ -0,0 +1,126 @@
+import sys
+import json
+import time
+
+FIELDS = ("id", "name", "description", "icon", "state")
+
+
+class EventStream(object):
+    """
+    JSON lines stream of the activities changes
+
+    The first line is a `snapshot` event holding every activity and the
+    current activity. It is followed by one line per change reported by the
+    registry: `added`, `removed`, `renamed`, `changed`, `state` and
+    `current`. Every event has an `event` and a `time` key.
+
+    Args:
+        registry (ActivityRegistry): Source of the changes
+        out: Text file object receiving the events, the standard output when
+            None
+        on_close (callable): Called when `out` is closed by the consumer
+
+    Attributes:
+        closed (bool): `out` was closed by the consumer
+    """
+
+    def __init__(self, registry, out=None, on_close=None):
+        self._registry = registry
+        self._out = out or sys.stdout
+        self._on_close = on_close
+        self.closed = False
+        self._activities = {}
+        self._current = None
+
+    def start(self):
+        """
+        Write the snapshot and subscribe to the registry
+
+        :return: None
+        """
+        self._activities = {
+            activity.id: _describe(activity) for activity in self._registry
+        }
+        self._current = self._registry.current
+        self._write(
+            "snapshot",
+            current=self._current,
+            activities=list(self._activities.values()),
+        )
+        self._registry.subscribe(self._on_event)
+
+    def stop(self):
+        """
+        Unsubscribe from the registry
+
+        :return: None
+        """
+        self._registry.unsubscribe(self._on_event)
+
+    def _on_event(self, event, activity_id):
+        if event == "current":
+            self._write("current", id=activity_id, previous=self._current)
+            self._current = activity_id
+        elif event == "removed":
+            self._activities.pop(activity_id, None)
+            self._write("removed", id=activity_id)
+        else:
+            self._on_activity_event(event, activity_id)
+
+    def _on_activity_event(self, event, activity_id):
+        activity = self._registry.get(activity_id)
+        previous = self._activities.get(activity_id)
+        current = self._activities[activity_id] = _describe(activity)
+
+        if event == "added" or previous is None:
+            self._write("added", activity=current)
+        elif event == "state":
+            self._write("state", id=activity_id, state=current["state"])
+        elif current["name"] != previous["name"]:
+            self._write(
+                "renamed",
+                id=activity_id,
+                name=current["name"],
+                previous=previous["name"],
+            )
+        elif current != previous:
+            self._write("changed", activity=current)
+
+    def _write(self, event, **data):
+        data["event"] = event
+        data["time"] = time.time()
+        try:
+            self._out.write(json.dumps(data) + "\n")
+            self._out.flush()
+        except BrokenPipeError:
+            self.closed = True
+            if self._on_close is not None:
+                self._on_close()
+
+
+def stream(registry, out=None):
+    """
+    Write the events of a registry until interrupted
+
+    :param registry: `ActivityRegistry`
+    :param out: Text file object receiving the events, the standard output
+    when None
+    :return: None
+    """
+    from gi.repository import GLib
+
+    loop = GLib.MainLoop()
+    events = EventStream(registry, out, on_close=loop.quit)
+    events.start()
+    try:
+        if not events.closed:
+            loop.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        events.stop()
+        registry.close()
+
+
+def _describe(activity):
+    return {field: getattr(activity, field) for field in FIELDS}
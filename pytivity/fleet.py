@@ -0,0 +1,189 @@
+import os
+import sys
+import json
+import functools
+import subprocess
+import collections
+import concurrent.futures
+
+Target = collections.namedtuple("Target", ["name", "env", "uid", "gid", "options"])
+Target.__doc__ = """
+Session bus on which a command is executed
+
+Attributes:
+    name (str): Runtime directory or address given by the user
+    env (dict): Environment of the command
+    uid (int): User the command runs as, None for the current user
+    gid (int): Group the command runs as, None for the current group
+    options (list): Options added to the command line of the command
+"""
+
+Result = collections.namedtuple("Result", ["target", "status", "output"])
+Result.__doc__ = """
+Result of a command on a target
+
+Attributes:
+    target (Target): Target of the command
+    status (int): Exit status of the command
+    output (str): Standard output of the command
+"""
+
+# Options of the command line only meaningful to the fleet mode, with the
+# number of values they take
+OPTIONS = {"--fleet": 1, "--fleet-workers": 1, "--fleet-json": 0}
+
+
+def resolve(target):
+    """
+    Target of a runtime directory or a bus address
+
+    A runtime directory (e.g. `/run/user/1000`) designates the session bus
+    of its owner: the command runs with the `bus` socket of the directory and
+    the home directory of the owner, as the owner if the current user is
+    root. Anything else is used as the address of the bus, the command then
+    runs without the names cache of the current user.
+
+    Only root can target the runtime directory of another user.
+
+    Commands never go through a pytivity daemon, which would execute them
+    on its own bus.
+
+    :param target: Runtime directory or D-Bus address
+    :return: `Target`
+    :raise ValueError: The runtime directory belongs to another user and
+    the current user is not root
+    """
+    env = dict(os.environ)
+    if not os.path.isdir(target):
+        env["DBUS_SESSION_BUS_ADDRESS"] = target
+        return Target(target, env, None, None, ["--no-daemon", "--no-name-cache"])
+
+    import pwd
+
+    env["DBUS_SESSION_BUS_ADDRESS"] = "unix:path={}".format(
+        os.path.join(os.path.abspath(target), "bus")
+    )
+    env["XDG_RUNTIME_DIR"] = os.path.abspath(target)
+
+    uid = os.stat(target).st_uid
+    if uid == os.getuid():
+        return Target(target, env, None, None, ["--no-daemon"])
+    if os.geteuid() != 0:
+        raise ValueError(
+            "Can not run commands on the session bus of another user without root"
+            " privileges: {}".format(target)
+        )
+
+    user = pwd.getpwuid(uid)
+    env.update(HOME=user.pw_dir, USER=user.pw_name, LOGNAME=user.pw_name)
+    for variable in ("XDG_CONFIG_HOME", "XDG_DATA_HOME", "XDG_CACHE_HOME"):
+        env.pop(variable, None)
+    return Target(target, env, uid, user.pw_gid, ["--no-daemon"])
+
+
+def run(targets, argv, workers=8, timeout=None):
+    """
+    Execute a pytivity command on several targets concurrently
+
+    Each command runs in its own `pytivity` process, started from a pool of
+    `workers` threads.
+
+    :param targets: List of `Target`
+    :param argv: Arguments of the command, without the fleet options
+    :param workers: Maximum number of commands running at the same time
+    :param timeout: Seconds after which a command is killed
+    :return: Generator of `Result`, in completion order
+    """
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_execute, target, argv, timeout) for target in targets]
+        for future in concurrent.futures.as_completed(futures):
+            yield future.result()
+
+
+def list_rows(results, columns):
+    """
+    Rows of `list --format jsonl` results prefixed by the target
+
+    Targets whose command failed are reported on the standard error.
+
+    :param results: Iterable of `Result`
+    :param columns: Columns of the listed activities
+    :return: Generator of rows
+    """
+    for result in results:
+        if result.status:
+            _report_error(result)
+            continue
+        for line in result.output.splitlines():
+            try:
+                activity = json.loads(line)
+            except ValueError:
+                _report_error(result)
+                break
+            yield [result.target.name] + [
+                str(activity.get(column, "")) for column in columns
+            ]
+
+
+def strip_options(argv):
+    """
+    Remove the fleet options from command line arguments
+
+    :param argv: Command line arguments
+    :return: List of arguments
+    """
+    stripped = []
+    skip = 0
+    for argument in argv:
+        if skip:
+            skip -= 1
+        elif argument in OPTIONS:
+            skip = OPTIONS[argument]
+        elif argument.split("=", 1)[0] not in OPTIONS:
+            stripped.append(argument)
+    return stripped
+
+
+def _execute(target, argv, timeout):
+    try:
+        process = subprocess.run(
+            [sys.executable, "-m", "pytivity.cli"] + target.options + argv,
+            env=target.env,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            universal_newlines=True,
+            timeout=timeout,
+            **_user_arguments(target)
+        )
+    except subprocess.TimeoutExpired:
+        return Result(target, 124, "Timeout")
+    except (OSError, subprocess.SubprocessError) as e:
+        # e.g. the user of the target could not be switched to
+        return Result(target, 1, str(e))
+    return Result(target, process.returncode, process.stdout)
+
+
+def _user_arguments(target):
+    # Arguments of `subprocess.run` executing the command as the user of the
+    # target
+    if target.uid is None:
+        return {}
+    if sys.version_info >= (3, 9):
+        return {"user": target.uid, "group": target.gid, "extra_groups": [target.gid]}
+    # `preexec_fn` is not safe in threads, only used by older Pythons
+    return {"preexec_fn": functools.partial(_switch_user, target.uid, target.gid)}
+
+
+def _switch_user(uid, gid):
+    # Executed in the child process before the command
+    os.setgroups([gid])
+    os.setgid(gid)
+    os.setuid(uid)
+
+
+def _report_error(result):
+    print(
+        "{}: {}".format(result.target.name, result.output.strip() or result.status),
+        file=sys.stderr,
+    )
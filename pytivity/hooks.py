@@ -0,0 +1,196 @@
+import os
+
+ACTIONS = ("activated", "deactivated", "started", "stopped")
+
+
+class HookIndex(object):
+    """
+    Index of the activities hook scripts
+
+    The hook scripts directory tree (`<path>/<id>/<action>/*.desktop`) is
+    walked once and the command of every script is kept in memory, keyed by
+    activity id and action. Each lookup only checks the modification time of
+    the action directory and parses it again when it changed.
+
+    Note:
+        Modifying a script in place does not change the modification time of
+        its directory, use `invalidate` after such a write.
+
+    Args:
+        path (str): Root of the hook scripts directory tree
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._scanned = False
+        self._mtimes = {}
+        self._commands = {}
+
+    def commands(self, activity_id, action):
+        """
+        Commands of the scripts of an activity action
+
+        :param activity_id: Id of the activity
+        :param action: `activated`, `deactivated`, `started` or `stopped`
+        :return: Mapping of script file name to command
+        """
+        if not self._scanned:
+            self.scan()
+
+        key = (activity_id, action)
+        directory = os.path.join(self.path, activity_id, action)
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+        except OSError:
+            mtime = None
+
+        if mtime != self._mtimes.get(key):
+            self._mtimes[key] = mtime
+            self._commands[key] = (
+                _parse_directory(directory) if mtime is not None else {}
+            )
+        return self._commands.get(key, {})
+
+    def command(self, activity_id, action, name):
+        """
+        Command of the script pytivity manages for an activity action
+
+        :param activity_id: Id of the activity
+        :param action: `activated`, `deactivated`, `started` or `stopped`
+        :param name: Name of the activity
+        :return: The command or an empty string
+        """
+        return self.commands(activity_id, action).get("{}.desktop".format(name), "")
+
+    def scan(self):
+        """
+        Walk the whole directory tree and parse every script
+
+        :return: None
+        """
+        self._mtimes = {}
+        self._commands = {}
+        self._scanned = True
+
+        try:
+            activities = list(os.scandir(self.path))
+        except OSError:
+            return
+
+        for activity in activities:
+            if not activity.is_dir():
+                continue
+
+            for action in ACTIONS:
+                directory = os.path.join(activity.path, action)
+                try:
+                    mtime = os.stat(directory).st_mtime_ns
+                except OSError:
+                    continue
+                self._mtimes[(activity.name, action)] = mtime
+                self._commands[(activity.name, action)] = _parse_directory(directory)
+
+    def invalidate(self, activity_id, action=None):
+        """
+        Forget the indexed scripts of an activity
+
+        :param activity_id: Id of the activity
+        :param action: Only forget the scripts of this action
+        :return: None
+        """
+        for action in (action,) if action else ACTIONS:
+            self._mtimes.pop((activity_id, action), None)
+            self._commands.pop((activity_id, action), None)
+
+
+def write_scripts(path, activity_id, scripts, prepare=()):
+    """
+    Write the hook scripts of an activity
+
+    Action directories are created with a single `os.makedirs` each, only
+    for the actions written or listed in `prepare`. Each script is written
+    to a temporary file renamed over the script, so a script is never left
+    truncated, and scripts already holding the content are not rewritten.
+
+    :param path: Root of the hook scripts directory tree
+    :param activity_id: Id of the activity
+    :param scripts: Mapping of action to a mapping of script file name to
+    content, a None content removes the script
+    :param prepare: Actions whose directory is created even without scripts
+    :return: Set of the actions whose scripts changed
+    """
+    changed = set()
+    directories = set(prepare)
+    directories.update(
+        action
+        for action, files in scripts.items()
+        if any(content is not None for content in files.values())
+    )
+    for action in directories:
+        os.makedirs(os.path.join(path, activity_id, action), exist_ok=True)
+
+    for action, files in scripts.items():
+        for name, content in files.items():
+            script = os.path.join(path, activity_id, action, os.path.basename(name))
+            if content is None:
+                if _remove(script):
+                    changed.add(action)
+            elif _read(script) != content:
+                _replace(script, content)
+                changed.add(action)
+    return changed
+
+
+def parse_script(path):
+    """
+    Command executed by a `.desktop` script
+
+    :param path: Path of the script
+    :return: The command, None if the script has no `Exec` entry
+    """
+    with open(path, "r") as f:
+        for line in f:
+            if line.startswith("Exec="):
+                if line.endswith("\n"):
+                    line = line[:-1]
+                return line[5:]
+    return None
+
+
+def _parse_directory(directory):
+    commands = {}
+    try:
+        entries = list(os.scandir(directory))
+    except OSError:
+        return commands
+
+    for entry in entries:
+        if entry.name.endswith(".desktop") and entry.is_file():
+            try:
+                commands[entry.name] = parse_script(entry.path)
+            except OSError:
+                continue
+    return commands
+
+
+def _read(path):
+    try:
+        with open(path, "r") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _replace(path, content):
+    tmp = "{}.{}.tmp".format(path, os.getpid())
+    with open(tmp, "w") as f:
+        f.write(content)
+    os.replace(tmp, path)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        return False
+    return True
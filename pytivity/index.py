@@ -0,0 +1,299 @@
+import os
+import json
+import bisect
+
+
+def __getattr__(name):
+    # The paths require pyxdg which is only imported when needed
+    if name == "CACHE_PATH":
+        return _cache_path()
+    if name == "RC_PATH":
+        return _rc_path()
+    if name == "NAMES_PATH":
+        return _names_path()
+    raise AttributeError("module {} has no attribute {}".format(__name__, name))
+
+
+class NameIndex(object):
+    """
+    Index of the activities names
+
+    Map the name of the activities to their id. The index can be persisted
+    in the XDG cache directory, it is then considered valid as long as the
+    kactivitymanagerd configuration file (holding the names) is unmodified.
+
+    Besides exact names, `match` resolves case-insensitive names, unique
+    prefixes and abbreviations using a sorted list of the folded names built
+    on first use.
+
+    Note:
+        When several activities share the same name the first one added to
+        the index is kept.
+
+    Args:
+        names (dict): Mapping of activity name to activity id
+        fresh (bool): The index is kept up to date with the bus (e.g. by an
+            `ActivityRegistry`), names it does not know do not exist
+    """
+
+    def __init__(self, names=None, fresh=False):
+        self._names = dict(names or {})
+        self._sorted = None
+        self.fresh = fresh
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, name):
+        return name in self._names
+
+    def get(self, name):
+        """
+        Id of the activity named `name`
+
+        :param name: Name of the activity
+        :return: Id of the activity or None
+        """
+        return self._names.get(name)
+
+    def match(self, query, fuzzy=True):
+        """
+        Id of the activity matching `query` (see `resolve`)
+
+        :param query: Name, prefix or abbreviation of the activity
+        :param fuzzy: Accept case-insensitive names, prefixes and abbreviations
+        :return: Id of the activity or None
+        :raise AmbiguousName: Several activities match
+        """
+        name = self.resolve(query, fuzzy)
+        if name is None:
+            return None
+        return self._names[name]
+
+    def resolve(self, query, fuzzy=True):
+        """
+        Name of the activity matching `query`
+
+        The first step finding activities wins: exact name, case-insensitive
+        name, case-insensitive prefix (`wo` for `Work`) and case-insensitive
+        abbreviation, the characters of `query` appearing in order in the name
+        (`wrk` for `Work`).
+
+        :param query: Name, prefix or abbreviation of the activity
+        :param fuzzy: Accept case-insensitive names, prefixes and
+        abbreviations, only the exact name otherwise
+        :return: Name of the activity as indexed or None
+        :raise AmbiguousName: Several activities match
+        """
+        if query in self._names:
+            return query
+        if not fuzzy:
+            return None
+
+        folded = query.casefold()
+        if not folded:
+            return None
+        for matches in (self._exact, self._prefixed, self._abbreviated):
+            names = matches(folded)
+            if len({self._names[name] for name in names}) == 1:
+                return names[0]
+            if names:
+                raise AmbiguousName(query, names)
+        return None
+
+    def _exact(self, folded):
+        return [name for key, name in self._prefix_range(folded) if key == folded]
+
+    def _prefixed(self, folded):
+        return [name for _, name in self._prefix_range(folded)]
+
+    def _abbreviated(self, folded):
+        return [name for key, name in self._sorted_names() if _abbreviates(folded, key)]
+
+    def _prefix_range(self, prefix):
+        names = self._sorted_names()
+        start = bisect.bisect_left(names, (prefix,))
+        end = start
+        while end < len(names) and names[end][0].startswith(prefix):
+            end += 1
+        return names[start:end]
+
+    def _sorted_names(self):
+        if self._sorted is None:
+            self._sorted = sorted((name.casefold(), name) for name in self._names)
+        return self._sorted
+
+    def names(self):
+        """
+        Names of the indexed activities
+
+        :return: List of names
+        """
+        return list(self._names)
+
+    def add(self, name, activity_id):
+        """
+        Add an activity to the index
+
+        :param name: Name of the activity
+        :param activity_id: Id of the activity
+        :return: None
+        """
+        self._names.setdefault(name, activity_id)
+        self._sorted = None
+
+    def remove(self, activity_id):
+        """
+        Remove an activity from the index
+
+        :param activity_id: Id of the activity
+        :return: None
+        """
+        self._names = {
+            name: id_ for name, id_ in self._names.items() if id_ != activity_id
+        }
+        self._sorted = None
+
+    def rename(self, activity_id, name):
+        """
+        Rename an activity in the index
+
+        :param activity_id: Id of the activity
+        :param name: New name of the activity
+        :return: None
+        """
+        self.remove(activity_id)
+        self._names[name] = activity_id
+        self._sorted = None
+
+    def save(self, path=None, names_path=None):
+        """
+        Persist the index
+
+        Besides the index, the names are written one per line to a text file
+        read by the shell completion scripts. Errors are ignored as the cache
+        is only an optimization.
+
+        :param path: Path of the cache file, defaults to `CACHE_PATH`
+        :param names_path: Path of the names file, defaults to `NAMES_PATH`
+        :return: None
+        """
+        path = path or _cache_path()
+        data = {"mtime": _rc_mtime(), "names": self._names}
+        names = sorted(name for name in self._names if "\n" not in name)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            _write(path, json.dumps(data))
+            _write(names_path or _names_path(), "".join(n + "\n" for n in names))
+        except OSError:
+            pass
+
+    @classmethod
+    def load(cls, path=None):
+        """
+        Load a persisted index
+
+        :param path: Path of the cache file, defaults to `CACHE_PATH`
+        :return: The index or None if there is no valid cache
+        """
+        mtime = _rc_mtime()
+        if mtime is None:
+            return None
+
+        path = path or _cache_path()
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if not isinstance(data, dict) or data.get("mtime") != mtime:
+            return None
+        return cls(data.get("names"))
+
+    @classmethod
+    def from_activities(cls, activities, fresh=False):
+        """
+        Build an index from a list of activities
+
+        :param activities: Iterable of activities
+        :param fresh: The index will be kept up to date with the bus
+        :return: The index
+        """
+        index = cls(fresh=fresh)
+        for activity in activities:
+            index.add(activity.name, activity.id)
+        return index
+
+
+class AmbiguousName(ValueError):
+    """
+    Several activities match a name
+
+    Args:
+        query (str): Searched name
+        names (list): Names of the matching activities
+    """
+
+    def __init__(self, query, names):
+        super().__init__(
+            "Several activities match the name {}: {}".format(
+                query, ", ".join(sorted(names))
+            )
+        )
+        self.query = query
+        self.names = names
+
+
+def _abbreviates(abbreviation, name):
+    characters = iter(name)
+    return all(character in characters for character in abbreviation)
+
+
+def is_cached(names_path=None):
+    """
+    Check if the names file is newer than the kactivitymanagerd configuration
+
+    This is the check made by the shell completion scripts.
+
+    :param names_path: Path of the names file, defaults to `NAMES_PATH`
+    :return: bool
+    """
+    try:
+        mtime = os.stat(names_path or _names_path()).st_mtime_ns
+    except OSError:
+        return False
+    rc_mtime = _rc_mtime()
+    return rc_mtime is None or mtime >= rc_mtime
+
+
+def _write(path, content):
+    tmp = "{}.{}.tmp".format(path, os.getpid())
+    with open(tmp, "w") as f:
+        f.write(content)
+    os.replace(tmp, path)
+
+
+def _rc_mtime():
+    try:
+        return os.stat(_rc_path()).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _cache_path():
+    from xdg.BaseDirectory import xdg_cache_home
+
+    return os.path.join(xdg_cache_home, "pytivity/names.json")
+
+
+def _names_path():
+    from xdg.BaseDirectory import xdg_cache_home
+
+    return os.path.join(xdg_cache_home, "pytivity/names.txt")
+
+
+def _rc_path():
+    from xdg.BaseDirectory import xdg_config_home
+
+    return os.path.join(xdg_config_home, "kactivitymanagerdrc")
@@ -1,12 +1,25 @@
 import os
 import shutil
 
-from pydbus import SessionBus
-from xdg.BaseDirectory import xdg_data_home
+from . import trace, connection
+from .hooks import ACTIONS, HookIndex, write_scripts
+from .index import NameIndex
+from .snapshot import ActivitySnapshot
 
 SHORTCUT_FILE = "[Desktop Entry]\nName={name}" "\nExec={command}\nType=Application\n"
-PATH = os.path.join(xdg_data_home, "kactivitymanagerd/activities")
 ACTIVITY_STATE = {2: "Started", 4: "Stopped"}
+_STATE_IDS = {state: state_id for state_id, state in ACTIVITY_STATE.items()}
+
+_NAME_INDEXES = {}
+_PATH = None
+_HOOK_INDEX = None
+
+
+def __getattr__(name):
+    # `PATH` requires pyxdg which is only imported when needed
+    if name == "PATH":
+        return _path()
+    raise AttributeError("module {} has no attribute {}".format(__name__, name))
 
 
 class KActivity(object):
@@ -20,12 +33,25 @@ class KActivity(object):
         Attributes are cached in the objects. Use the `refresh` method to
         reset the cache.
 
-        A new activity can be created with the `create` class method
+        A new activity can be created with the `create` class method and all
+        the existing activities can be listed with the `list_all` class method
+
+        Names are resolved through an index built once per bus. Unless
+        `name_cache` is set to False the index is persisted in the XDG cache
+        directory to be reused by later processes. Only exact names are
+        trusted in the persisted index, which may miss recent activities:
+        prefixes and abbreviations are resolved against the activities on
+        the bus.
+
+        The bus can be replaced by another backend of the activity manager,
+        such as the read-only `pytivity.backends.FileBackend`.
 
     Args:
         id_or_name (str): Name or ID of the activity
          bus: Proxy dbus object to 'org.kde.ActivityManager
          /ActivityManager/Activities'
+        fuzzy (bool): Accept a case-insensitive name, a unique prefix or an
+            abbreviation of the name, only the exact name otherwise
 
     Attributes:
         id (str): Id of the activity
@@ -40,21 +66,20 @@ class KActivity(object):
 
     """
 
-    def __init__(self, id_or_name, bus=None):
+    name_cache = True
+
+    def __init__(self, id_or_name, bus=None, fuzzy=True):
         if not bus:
-            bus = SessionBus()
-            self._activity_bus = bus.get(
-                "org.kde.ActivityManager", "/ActivityManager/Activities"
-            )
+            self._activity_bus = connection.activity_bus()
         else:
             self._activity_bus = bus
 
+        self._name = None
         if len(id_or_name) != 36:
-            self.id = self._find_id(id_or_name)
+            self._name, self.id = self._find(id_or_name, fuzzy)
         else:
             self.id = id_or_name
 
-        self._name = None
         self._description = None
         self._icon = None
         self._state = None
@@ -85,8 +110,16 @@ class KActivity(object):
         :return: None
         """
         self._activity_bus.RemoveActivity(self.id)
+        self._forget()
+
+    def _forget(self):
+        # Clean up after the removal of the activity
         self._delete_directory()
 
+        index = _NAME_INDEXES.get(self._activity_bus)
+        if index is not None:
+            index.remove(self.id)
+
     def activate(self):
         """
         Activate the activity
@@ -94,6 +127,7 @@ class KActivity(object):
         :return: None
         """
         self._activity_bus.SetCurrentActivity(self.id)
+        self._state = None
 
     def start(self):
         """
@@ -102,6 +136,7 @@ class KActivity(object):
         :return: None
         """
         self._activity_bus.StartActivity(self.id)
+        self._state = None
 
     def stop(self):
         """
@@ -110,10 +145,11 @@ class KActivity(object):
         :return: None
         """
         self._activity_bus.StopActivity(self.id)
+        self._state = None
 
     @property
     def name(self):
-        if not self._name:
+        if self._name is None:
             self._name = self._activity_bus.ActivityName(self.id)
         return self._name
 
@@ -122,9 +158,13 @@ class KActivity(object):
         self._activity_bus.SetActivityName(self.id, name)
         self._name = name
 
+        index = _NAME_INDEXES.get(self._activity_bus)
+        if index is not None:
+            index.rename(self.id, name)
+
     @property
     def description(self):
-        if not self._description:
+        if self._description is None:
             self._description = self._activity_bus.ActivityDescription(self.id)
         return self._description
 
@@ -135,7 +175,7 @@ class KActivity(object):
 
     @property
     def icon(self):
-        if not self._icon:
+        if self._icon is None:
             self._icon = self._activity_bus.ActivityIcon(self.id)
         return self._icon
 
@@ -146,7 +186,8 @@ class KActivity(object):
 
     @property
     def state(self):
-        self._state = self._activity_bus.ActivityState(self.id)
+        if self._state is None:
+            self._state = self._activity_bus.ActivityState(self.id)
         return ACTIVITY_STATE.get(self._state, self._state)
 
     @state.setter
@@ -161,11 +202,7 @@ class KActivity(object):
 
     @activated.setter
     def activated(self, command):
-        if command:
-            self._create_activity_script("activated", command)
-        else:
-            self._delete_activity_script("activated")
-        self._activated = command
+        self.set_commands(activated=command)
 
     @property
     def deactivated(self):
@@ -175,11 +212,7 @@ class KActivity(object):
 
     @deactivated.setter
     def deactivated(self, command):
-        if command:
-            self._create_activity_script("deactivated", command)
-        else:
-            self._delete_activity_script("deactivated")
-        self._deactivated = command
+        self.set_commands(deactivated=command)
 
     @property
     def stopped(self):
@@ -189,11 +222,7 @@ class KActivity(object):
 
     @stopped.setter
     def stopped(self, command):
-        if command:
-            self._create_activity_script("stopped", command)
-        else:
-            self._delete_activity_script("stopped")
-        self._stopped = command
+        self.set_commands(stopped=command)
 
     @property
     def started(self):
@@ -203,66 +232,180 @@ class KActivity(object):
 
     @started.setter
     def started(self, command):
-        if command:
-            self._create_activity_script("started", command)
-        else:
-            self._delete_activity_script("started")
-        self._started = command
-
-    def _create_directory(self):
-        if not os.path.isdir(PATH):
-            os.mkdir(PATH)
-
-        path = os.path.join(PATH, self.id)
-        if not os.path.isdir(path):
-            os.mkdir(path)
-
-        for dir in ["activated", "deactivated", "started", "stopped"]:
-            p = os.path.join(path, dir)
-            if not os.path.isdir(p):
-                os.mkdir(p)
-
-    def _find_id(self, name):
-        for activity_id in self._activity_bus.ListActivities(
-            2
-        ) + self._activity_bus.ListActivities(4):
-            if name == self._activity_bus.ActivityName(activity_id):
-                return activity_id
-        raise ValueError("No activity exist with the name: {}".format(name))
+        self.set_commands(started=command)
 
-    def _delete_directory(self):
-        shutil.rmtree(os.path.join(PATH, self.id))
+    def set_commands(self, **commands):
+        """
+        Set several hook commands with a single write of the scripts
 
-    def _create_activity_script(self, action, command):
-        self._create_directory()
-        path = "{path}/{id}/{action}/{name}.desktop".format(
-            path=PATH, id=self.id, action=action, name=self.name
-        )
-        with open(path, "w") as f:
-            f.write(SHORTCUT_FILE.format(name=self.name, command=command))
+        :param commands: Command by action (`activated`, `deactivated`,
+        `started` or `stopped`), an empty command removes the script
+        :return: None
+        """
+        self._write_commands(commands)
+
+    def _write_commands(self, commands, prepare=()):
+        unknown = set(commands) - set(ACTIONS)
+        if unknown:
+            raise ValueError("Unknown actions: {}".format(", ".join(sorted(unknown))))
+
+        with trace.span("io", "write scripts"):
+            _write_activity_scripts(self.id, self.name, commands, prepare)
+        for action, command in commands.items():
+            setattr(self, "_" + action, command)
+
+    def _find(self, query, fuzzy):
+        # Name and id of the activity matching `query`
+        index = _NAME_INDEXES.get(self._activity_bus)
+        if index is None and self.name_cache:
+            index = NameIndex.load()
+            _NAME_INDEXES[self._activity_bus] = index
+
+        name = _match_name(index, query, fuzzy)
+        if name is None and (index is None or not index.fresh):
+            index = NameIndex.from_activities(self.list_all(bus=self._activity_bus))
+            _NAME_INDEXES[self._activity_bus] = index
+            if self.name_cache:
+                index.save()
+            name = index.resolve(query, fuzzy)
+
+        if name is None:
+            raise ValueError("No activity exist with the name: {}".format(query))
+        return name, index.get(name)
 
-    def _delete_activity_script(self, action):
-        path = "{path}/{id}/{action}/{name}.desktop".format(
-            path=PATH, id=self.id, action=action, name=self.name
-        )
-        try:
-            os.remove(path)
-        except IOError:
-            pass
+    def _delete_directory(self):
+        path = os.path.join(_path(), self.id)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        _hook_index().invalidate(self.id)
 
     def _command_in_activity_script(self, action):
-        path = "{path}/{id}/{action}/{name}.desktop".format(
-            path=PATH, id=self.id, action=action, name=self.name
+        with trace.span("io", "read {}".format(action)):
+            return _read_activity_script(self.id, action, self.name)
+
+    @classmethod
+    def list_all(cls, bus=None):
+        """
+        List the started and stopped activities
+
+        When the daemon supports it the name, description, icon and state of
+        every activity are fetched with a single `ListActivitiesWithInformation`
+        call. Otherwise the activities are listed by state and the other
+        attributes are fetched lazily, one call per attribute.
+
+        :param bus: Proxy dbus object to 'org.kde.ActivityManager
+        /ActivityManager/Activities'
+        :return: The list of activities, started activities first
+        """
+
+        if not bus:
+            bus = connection.activity_bus()
+
+        list_with_information = getattr(bus, "ListActivitiesWithInformation", None)
+        if list_with_information is None:
+            activities = []
+            for state in ACTIVITY_STATE:
+                # The state of the activities is the one they are listed by
+                for activity_id in bus.ListActivities(state):
+                    activity = cls(activity_id, bus=bus)
+                    activity._state = state
+                    activities.append(activity)
+            return activities
+
+        activities = {state: [] for state in ACTIVITY_STATE}
+        for information in list_with_information():
+            activity = cls._from_information(information, bus=bus)
+            if activity._state in activities:
+                activities[activity._state].append(activity)
+
+        return activities[2] + activities[4]
+
+    @classmethod
+    def _from_information(cls, information, bus):
+        activity = cls(information[0], bus=bus)
+        activity._prime(information)
+        return activity
+
+    def _prime(self, information):
+        _, self._name, self._description, self._icon, self._state = information
+
+    def snapshot(self):
+        """
+        Immutable copy of the attributes of the activity
+
+        :return: `ActivitySnapshot`
+        """
+        return ActivitySnapshot(
+            self.id,
+            self.name,
+            self.description,
+            self.icon,
+            self.state,
+            self.activated,
+            self.deactivated,
+            self.started,
+            self.stopped,
         )
-        try:
-            with open(path, "r") as f:
-                for line in f:
-                    if line.startswith("Exec="):
-                        if line.endswith("\n"):
-                            line = line[:-1]
-                        return line[5:]
-        except IOError:
-            return ""
+
+    @classmethod
+    def from_snapshot(cls, snapshot, bus=None):
+        """
+        Activity with the attributes of a snapshot already cached
+
+        :param snapshot: `ActivitySnapshot`
+        :param bus: Proxy dbus object to 'org.kde.ActivityManager
+        /ActivityManager/Activities'
+        :return: The activity
+        """
+        activity = cls(snapshot.id, bus=bus)
+        activity._name = snapshot.name
+        activity._description = snapshot.description
+        activity._icon = snapshot.icon
+        activity._state = _STATE_IDS.get(snapshot.state, snapshot.state)
+        activity._activated = snapshot.activated
+        activity._deactivated = snapshot.deactivated
+        activity._started = snapshot.started
+        activity._stopped = snapshot.stopped
+        return activity
+
+    @classmethod
+    def snapshot_all(cls, bus=None):
+        """
+        Snapshots of the started and stopped activities
+
+        With `ListActivitiesWithInformation` the snapshots are built from a
+        single call and the in memory index of the hook scripts, without
+        creating `KActivity` objects.
+
+        :param bus: Proxy dbus object to 'org.kde.ActivityManager
+        /ActivityManager/Activities'
+        :return: The list of snapshots, started activities first
+        """
+        if not bus:
+            bus = connection.activity_bus()
+
+        list_with_information = getattr(bus, "ListActivitiesWithInformation", None)
+        if list_with_information is None:
+            return [activity.snapshot() for activity in cls.list_all(bus=bus)]
+
+        snapshots = {state: [] for state in ACTIVITY_STATE}
+        for activity_id, name, description, icon, state in list_with_information():
+            if state in snapshots:
+                snapshots[state].append(
+                    ActivitySnapshot(
+                        activity_id,
+                        name,
+                        description,
+                        icon,
+                        ACTIVITY_STATE[state],
+                        *(
+                            _read_activity_script(activity_id, action, name)
+                            for action in ACTIONS
+                        )
+                    )
+                )
+
+        return snapshots[2] + snapshots[4]
 
     @classmethod
     def create(
@@ -292,27 +435,78 @@ class KActivity(object):
         """
 
         if not bus:
-            bus = SessionBus().get(
-                "org.kde.ActivityManager", "/ActivityManager/Activities"
-            )
+            bus = connection.activity_bus()
 
         activity_id = bus.AddActivity(name)
 
+        index = _NAME_INDEXES.get(bus)
+        if index is not None:
+            index.add(name, activity_id)
+
         activity = KActivity(activity_id, bus=bus)
-        activity._create_directory()
         activity._name = name
 
         if icon is not None:
             activity.icon = icon
         if description is not None:
             activity.description = description
-        if activated is not None:
-            activity.activated = activated
-        if deactivated is not None:
-            activity.deactivated = deactivated
-        if started is not None:
-            activity.started = started
-        if stopped is not None:
-            activity.stopped = stopped
+
+        commands = {
+            "activated": activated,
+            "deactivated": deactivated,
+            "started": started,
+            "stopped": stopped,
+        }
+        activity._write_commands(
+            {
+                action: command
+                for action, command in commands.items()
+                if command is not None
+            },
+            prepare=ACTIONS,
+        )
 
         return activity
+
+
+def _match_name(index, query, fuzzy=True):
+    # An index which is not kept up to date (e.g. loaded from the cache) may
+    # miss activities: a prefix of a missing activity would resolve to
+    # another one, only its exact names are trusted
+    if index is None:
+        return None
+    return index.resolve(query, fuzzy and index.fresh)
+
+
+def _path():
+    global _PATH
+    if _PATH is None:
+        from xdg.BaseDirectory import xdg_data_home
+
+        _PATH = os.path.join(xdg_data_home, "kactivitymanagerd/activities")
+    return _PATH
+
+
+def _write_activity_scripts(activity_id, name, commands, prepare=()):
+    # Write the scripts of several actions, empty commands remove the script
+    scripts = {
+        action: {
+            "{}.desktop".format(name): (
+                SHORTCUT_FILE.format(name=name, command=command) if command else None
+            )
+        }
+        for action, command in commands.items()
+    }
+    for action in write_scripts(_path(), activity_id, scripts, prepare):
+        _hook_index().invalidate(activity_id, action)
+
+
+def _read_activity_script(activity_id, action, name):
+    return _hook_index().command(activity_id, action, name)
+
+
+def _hook_index():
+    global _HOOK_INDEX
+    if _HOOK_INDEX is None:
+        _HOOK_INDEX = HookIndex(_path())
+    return _HOOK_INDEX
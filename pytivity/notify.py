@@ -0,0 +1,124 @@
+from . import trace
+
+SERVICE = "org.freedesktop.Notifications"
+PATH = "/org/freedesktop/Notifications"
+INTERFACE = "org.freedesktop.Notifications"
+DEFAULT_ICON = "dialog-information"
+
+_NOTIFIERS = {}
+
+
+class Notifier(object):
+    """
+    Coalescing dispatcher of desktop notifications
+
+    Notifications are queued by `notify` and sent by `flush`. Notifications
+    of the same group (e.g. the activities stopped by one command) are merged
+    in a single summary. They are sent without waiting for the reply of the
+    notification server, so the round trip is not on the path of the command.
+
+    Args:
+        bus: Proxy dbus object to 'org.freedesktop.Notifications'
+        app_name (str): Name of the application sending the notifications
+        expire (int): Milliseconds after which notifications are closed
+        connection: `pydbus.bus.Bus` of the proxy, the notifications are
+            sent through the proxy, waiting for the replies, when None
+    """
+
+    def __init__(self, bus, app_name="Pytivity", expire=2000, connection=None):
+        self.app_name = app_name
+        self.expire = expire
+        self._bus = bus
+        self._connection = connection
+        self._queue = []
+
+    def notify(self, title, body, icon=None, group=None):
+        """
+        Queue a notification
+
+        :param title: Title of the notification
+        :param body: Body of the notification
+        :param icon: Name of the icon, `DEFAULT_ICON` when empty
+        :param group: Action merging the notifications of several activities
+        (e.g. `stopped`), None to always send the notification on its own
+        :return: None
+        """
+        self._queue.append((title, body, icon or DEFAULT_ICON, group))
+
+    def flush(self):
+        """
+        Send the queued notifications
+
+        :return: Number of notifications sent
+        """
+        queue, self._queue = self._queue, []
+
+        groups = {}
+        for notification in queue:
+            # Notifications without group get a key of their own
+            group = notification[3] or object()
+            groups.setdefault(group, []).append(notification)
+
+        for group, notifications in groups.items():
+            if len(notifications) == 1:
+                title, body, icon, _ = notifications[0]
+            else:
+                title, body, icon = _summary(group, notifications)
+            self._send(title, body, icon)
+
+        if groups:
+            self._flush_connection()
+        return len(groups)
+
+    def _send(self, title, body, icon):
+        parameters = (self.app_name, 0, icon, title, body, [], {}, self.expire)
+        if self._connection is None:
+            self._bus.Notify(*parameters)
+            return
+
+        from gi.repository import Gio, GLib
+
+        with trace.span("dbus", "Notifications.Notify (no reply)"):
+            self._connection.con.call(
+                SERVICE,
+                PATH,
+                INTERFACE,
+                "Notify",
+                GLib.Variant("(susssasa{sv}i)", parameters),
+                None,
+                Gio.DBusCallFlags.NONE,
+                -1,
+                None,
+                None,
+                None,
+            )
+
+    def _flush_connection(self):
+        # Write the queued messages before the process exits
+        if self._connection is not None:
+            self._connection.con.flush_sync(None)
+
+
+def notifier(bus):
+    """
+    Shared notifier of a notification proxy
+
+    :param bus: Proxy dbus object to 'org.freedesktop.Notifications'
+    :return: `Notifier`
+    """
+    from .connection import MANAGER
+
+    dispatcher = _NOTIFIERS.get(bus)
+    if dispatcher is None:
+        dispatcher = Notifier(bus, connection=MANAGER.bus_of(bus))
+        _NOTIFIERS[bus] = dispatcher
+    return dispatcher
+
+
+def _summary(group, notifications):
+    icons = {icon for _, _, icon, _ in notifications}
+    return (
+        "{} activities {} !".format(len(notifications), group),
+        "\n".join(title for title, _, _, _ in notifications),
+        icons.pop() if len(icons) == 1 else DEFAULT_ICON,
+    )
@@ -0,0 +1,133 @@
+import csv
+import sys
+import json
+
+FORMATS = ("table", "jsonl", "csv", "tsv")
+
+COLUMNS = {
+    "bus": "Bus",
+    "status": "Status",
+    "output": "Output",
+    "id": "ID",
+    "name": "Name",
+    "state": "State",
+    "activated": "Cmd Activated",
+    "deactivated": "Cmd Deactivated",
+    "started": "Cmd started",
+    "stopped": "Cmd stopped",
+    "icon": "Icon",
+    "description": "Description",
+}
+
+TABLE_CHUNK = 500
+
+
+def rows(activities, columns):
+    """
+    Lazily read the columns of activities
+
+    :param activities: Iterable of activities
+    :param columns: Attributes of the activities to read, keys of `COLUMNS`
+    :return: Generator of lists of strings, None values are empty strings
+    """
+    for activity in activities:
+        yield [_text(getattr(activity, column)) for column in columns]
+
+
+def write(rows, columns, format, f=None, header=True):
+    """
+    Write rows as soon as they are produced
+
+    :param rows: Iterable of rows, as returned by `rows`
+    :param columns: Keys of `COLUMNS` matching the values of the rows
+    :param format: `jsonl`, `csv`, `tsv` or `raw` (comma separated values
+    quoted when needed, without header)
+    :param f: Text file object, the standard output when None
+    :param header: Write the column titles first (`csv` and `tsv`)
+    :return: Number of rows written
+    """
+    if f is None:
+        f = sys.stdout
+
+    if format == "jsonl":
+        writer = _JsonLinesWriter(f, columns)
+    elif format == "raw":
+        writer = _RawWriter(f)
+    else:
+        writer = csv.writer(
+            f, dialect="excel-tab" if format == "tsv" else "excel", lineterminator="\n"
+        )
+        if header:
+            writer.writerow(COLUMNS[column] for column in columns)
+
+    count = 0
+    for row in rows:
+        writer.writerow(row)
+        f.flush()
+        count += 1
+    return count
+
+
+def print_table(rows, columns, title="Activities", f=None, chunk=TABLE_CHUNK):
+    """
+    Print rows in ASCII tables of at most `chunk` rows
+
+    A table is printed as soon as its rows are read, so long lists start to
+    be displayed before all the activities are read. Each table repeats the
+    header, only the first one has a title.
+
+    :param rows: Iterable of rows, as returned by `rows`
+    :param columns: Keys of `COLUMNS` matching the values of the rows
+    :param title: Title of the first table
+    :param f: Text file object, the standard output when None
+    :param chunk: Maximum number of rows per table
+    :return: Number of rows printed
+    """
+    from terminaltables import AsciiTable
+
+    if f is None:
+        f = sys.stdout
+
+    header = [COLUMNS[column] for column in columns]
+    count = 0
+    data = [header]
+    for row in rows:
+        data.append(row)
+        count += 1
+        if len(data) > chunk:
+            print(AsciiTable(table_data=data, title=title).table, file=f, flush=True)
+            data = [header]
+            title = None
+
+    if len(data) > 1 or count == 0:
+        print(AsciiTable(table_data=data, title=title).table, file=f, flush=True)
+    return count
+
+
+def _text(value):
+    if value is None:
+        return ""
+    return str(value)
+
+
+class _JsonLinesWriter(object):
+    def __init__(self, f, columns):
+        self._f = f
+        self._columns = columns
+
+    def writerow(self, row):
+        self._f.write(json.dumps(dict(zip(self._columns, row))) + "\n")
+
+
+class _RawWriter(object):
+    def __init__(self, f):
+        self._f = f
+
+    def writerow(self, row):
+        self._f.write(", ".join(_quote(value) for value in row) + "\n")
+
+
+def _quote(value):
+    if any(character in value for character in ',"\n'):
+        return '"{}"'.format(value.replace('"', '""'))
+    return value
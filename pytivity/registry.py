@@ -0,0 +1,161 @@
+from . import connection
+from .index import NameIndex
+from .kactivity import _NAME_INDEXES, KActivity
+
+
+class ActivityRegistry(object):
+    """
+    Live registry of the KDE activities
+
+    The registry holds one shared `KActivity` per activity and keeps their
+    cached attributes up to date from the ActivityManager signals. Reading
+    `name`, `description`, `icon` or `state` of a registered activity does
+    not require any D-Bus call.
+
+    Note:
+        Signals are only delivered while a GLib main loop is running.
+
+        Listeners registered with `subscribe` are called with the event name
+        (`added`, `removed`, `changed`, `state` or `current`) and the id of the
+        activity.
+
+    Args:
+        bus: Proxy dbus object to 'org.kde.ActivityManager
+        /ActivityManager/Activities'
+
+    Attributes:
+        current (str): Id of the current activity
+    """
+
+    def __init__(self, bus=None):
+        if not bus:
+            bus = connection.activity_bus()
+        self._activity_bus = bus
+        self._listeners = []
+
+        self._subscriptions = [
+            bus.ActivityAdded.connect(self._on_added),
+            bus.ActivityRemoved.connect(self._on_removed),
+            bus.ActivityChanged.connect(self._on_changed),
+            bus.ActivityStateChanged.connect(self._on_state_changed),
+            bus.CurrentActivityChanged.connect(self._on_current_changed),
+        ]
+
+        self._activities = {
+            activity.id: activity for activity in KActivity.list_all(bus=bus)
+        }
+        self.current = bus.CurrentActivity()
+
+        self._names = NameIndex.from_activities(self._activities.values(), fresh=True)
+        _NAME_INDEXES[bus] = self._names
+
+    def __len__(self):
+        return len(self._activities)
+
+    def __iter__(self):
+        return iter(list(self._activities.values()))
+
+    def __contains__(self, activity_id):
+        return activity_id in self._activities
+
+    def get(self, id_or_name):
+        """
+        Registered activity
+
+        :param id_or_name: Name, unique prefix or abbreviation (see
+        `NameIndex.match`) or ID of the activity
+        :return: The shared activity instance
+        """
+        activity = self._activities.get(id_or_name)
+        if activity is not None:
+            return activity
+
+        activity = self._activities.get(self._index().match(id_or_name))
+        if activity is not None:
+            return activity
+        raise ValueError("No activity exist with the name: {}".format(id_or_name))
+
+    @property
+    def current_activity(self):
+        return self._activities.get(self.current)
+
+    def subscribe(self, listener):
+        """
+        Register a function called on every change
+
+        :param listener: Callable taking the event name and the activity id
+        :return: None
+        """
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        """
+        Unregister a function previously registered with `subscribe`
+
+        :param listener: The registered callable
+        :return: None
+        """
+        self._listeners.remove(listener)
+
+    def close(self):
+        """
+        Disconnect from the ActivityManager signals
+
+        :return: None
+        """
+        for subscription in self._subscriptions:
+            subscription.disconnect()
+        self._subscriptions = []
+
+        # Without the signals the index can miss activities
+        self._names.fresh = False
+        if _NAME_INDEXES.get(self._activity_bus) is self._names:
+            del _NAME_INDEXES[self._activity_bus]
+
+    def _fetch(self, activity_id):
+        activity = self._activities.get(activity_id)
+        if activity is None:
+            activity = KActivity(activity_id, bus=self._activity_bus)
+        else:
+            activity.refresh()
+
+        activity_information = getattr(self._activity_bus, "ActivityInformation", None)
+        if activity_information is not None:
+            activity._prime(activity_information(activity_id))
+        return activity
+
+    def _notify(self, event, activity_id):
+        for listener in list(self._listeners):
+            listener(event, activity_id)
+
+    def _on_added(self, activity_id):
+        activity = self._fetch(activity_id)
+        self._activities[activity_id] = activity
+        self._index().add(activity.name, activity_id)
+        self._notify("added", activity_id)
+
+    def _on_removed(self, activity_id):
+        self._activities.pop(activity_id, None)
+        self._index().remove(activity_id)
+        self._notify("removed", activity_id)
+
+    def _on_changed(self, activity_id):
+        activity = self._fetch(activity_id)
+        self._activities[activity_id] = activity
+        self._index().rename(activity_id, activity.name)
+        self._notify("changed", activity_id)
+
+    def _on_state_changed(self, activity_id, state):
+        activity = self._activities.get(activity_id)
+        if activity is None:
+            return self._on_added(activity_id)
+
+        activity._state = state
+        self._notify("state", activity_id)
+
+    def _on_current_changed(self, activity_id):
+        self.current = activity_id
+        self._notify("current", activity_id)
+
+    def _index(self):
+        return self._names
@@ -0,0 +1,46 @@
+import collections
+
+FIELDS = (
+    "id",
+    "name",
+    "description",
+    "icon",
+    "state",
+    "activated",
+    "deactivated",
+    "started",
+    "stopped",
+)
+
+
+class ActivitySnapshot(collections.namedtuple("ActivitySnapshot", FIELDS)):
+    """
+    Immutable copy of the attributes of an activity
+
+    Snapshots do not hold a connection to the activity manager, reading their
+    attributes never calls D-Bus. They are hashable, comparable and can be
+    serialized with `to_dict`. See `KActivity.snapshot_all` to read all the
+    activities at once and `KActivity.snapshot` / `KActivity.from_snapshot`
+    for the conversions.
+
+    Attributes:
+        id (str): Id of the activity
+        name (str): Name of the activity
+        description (str): Description of the activity
+        icon (str): Icon of the activity
+        state (str): State of the activity (`Started` or `Stopped`)
+        activated (str): Command executed at activation of the activity
+        deactivated (str): Command executed at deactivation of the activity
+        started (str): Command executed at startup of the activity
+        stopped (str): Command executed at shutdown of the activity
+    """
+
+    __slots__ = ()
+
+    def to_dict(self):
+        """
+        Attributes of the snapshot
+
+        :return: dict
+        """
+        return dict(zip(FIELDS, self))
@@ -0,0 +1,222 @@
+import os
+import sys
+import json
+import time
+import threading
+import contextlib
+
+BUCKETS = (0.0001, 0.001, 0.01, 0.1, 1)
+
+TRACER = None
+
+
+class Tracer(object):
+    """
+    Recorder of the D-Bus calls and file I/O
+
+    Calls made through proxies returned by `wrap` and the code executed in
+    `span` are recorded as Chrome trace events (see `write`) and their
+    durations aggregated per name (see `summary`).
+    """
+
+    def __init__(self):
+        self.events = []
+        self.durations = {}
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def span(self, category, name, **args):
+        """
+        Record the execution of a block of code
+
+        :param category: Category of the event (`dbus` or `io`)
+        :param name: Name of the event
+        :param args: Additional data stored in the event
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(category, name, start, time.perf_counter() - start, args)
+
+    def record(self, category, name, start, duration, args=None):
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": (start - self._origin) * 1e6,
+            "dur": duration * 1e6,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+        }
+        if args:
+            event["args"] = args
+
+        with self._lock:
+            self.events.append(event)
+            self.durations.setdefault((category, name), []).append(duration)
+
+    def wrap(self, proxy, name):
+        """
+        Wrap a D-Bus proxy so its method calls are recorded
+
+        :param proxy: pydbus proxy object
+        :param name: Name of the proxy, prefixed to the method names
+        :return: The wrapped proxy
+        """
+        return TracedProxy(proxy, name, self)
+
+    def summary(self):
+        """
+        Human readable summary of the recorded durations
+
+        :return: str
+        """
+        header = "{:<48} {:>6} {:>10} {:>10}  {}".format(
+            "Name", "Count", "Total ms", "Max ms", histogram_header()
+        )
+        lines = [header]
+        for (category, name), durations in sorted(self.durations.items()):
+            if category != "dbus":
+                name = "{}:{}".format(category, name)
+            lines.append(
+                "{:<48} {:>6} {:>10.2f} {:>10.2f}  {}".format(
+                    name[-48:],
+                    len(durations),
+                    sum(durations) * 1000,
+                    max(durations) * 1000,
+                    " ".join("{:>8}".format(count) for count in histogram(durations)),
+                )
+            )
+        return "\n".join(lines)
+
+    def write(self, path):
+        """
+        Write the events in the Chrome trace format
+
+        :param path: Path of the trace file
+        :return: None
+        """
+        with open(path, "w") as f:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, f)
+
+
+class TracedProxy(object):
+    """
+    D-Bus proxy recording its method calls in a `Tracer`
+
+    Args:
+        proxy: pydbus proxy object
+        name (str): Name of the proxy
+        tracer (Tracer): Recorder of the calls
+    """
+
+    def __init__(self, proxy, name, tracer):
+        self._proxy = proxy
+        self._name = name
+        self._tracer = tracer
+
+    def __getattr__(self, attribute):
+        value = getattr(self._proxy, attribute)
+        if not callable(value) or hasattr(value, "connect"):
+            return value
+
+        name = "{}.{}".format(self._name, attribute)
+        tracer = self._tracer
+
+        def traced(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return value(*args, **kwargs)
+            finally:
+                tracer.record("dbus", name, start, time.perf_counter() - start)
+
+        setattr(self, attribute, traced)
+        return traced
+
+
+def histogram(durations):
+    """
+    Distribution of durations in the `BUCKETS`
+
+    :param durations: Durations in seconds
+    :return: List of counts, one per bucket plus the overflow
+    """
+    counts = [0] * (len(BUCKETS) + 1)
+    for duration in durations:
+        for i, limit in enumerate(BUCKETS):
+            if duration < limit:
+                counts[i] += 1
+                break
+        else:
+            counts[-1] += 1
+    return counts
+
+
+def histogram_header():
+    labels = ["<{:g}ms".format(limit * 1000) for limit in BUCKETS]
+    labels.append(">={:g}ms".format(BUCKETS[-1] * 1000))
+    return " ".join("{:>8}".format(label) for label in labels)
+
+
+def enable():
+    """
+    Enable the process wide tracer
+
+    :return: The tracer
+    """
+    global TRACER
+    if TRACER is None:
+        TRACER = Tracer()
+    return TRACER
+
+
+def wrap(proxy, name):
+    """
+    Wrap a D-Bus proxy in the process wide tracer, if enabled
+
+    :param proxy: pydbus proxy object
+    :param name: Name of the proxy
+    :return: The wrapped proxy, or `proxy` when tracing is disabled
+    """
+    if TRACER is None or proxy is None:
+        return proxy
+    return TRACER.wrap(proxy, name)
+
+
+def span(category, name):
+    """
+    Record a block of code in the process wide tracer, if enabled
+
+    :param category: Category of the event
+    :param name: Name of the event
+    :return: Context manager
+    """
+    if TRACER is None:
+        return _NO_SPAN
+    return TRACER.span(category, name)
+
+
+def report(path):
+    """
+    Write the trace of the process wide tracer and print its summary
+
+    :param path: Path of the trace file
+    :return: None
+    """
+    if TRACER is None:
+        return
+    TRACER.write(path)
+    print(TRACER.summary(), file=sys.stderr)
+
+
+class _NoSpan(object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
@@ -0,0 +1,155 @@
+import re
+import fnmatch
+import concurrent.futures
+
+GLOB_CHARACTERS = ("*", "?", "[")
+
+
+def is_pattern(name):
+    """
+    Check if a name is a glob pattern
+
+    :param name: Name, ID or glob pattern of activities
+    :return: bool
+    """
+    return any(character in name for character in GLOB_CHARACTERS)
+
+
+def select(activities, patterns=(), regex=False, all_except=()):
+    """
+    Select activities by name, ID, glob pattern or regular expression
+
+    :param activities: List of activities, as returned by `KActivity.list_all`
+    :param patterns: Names, IDs or patterns of the activities to select, all
+    the activities when empty
+    :param regex: Patterns are regular expressions instead of glob patterns
+    :param all_except: Names, IDs or patterns of activities to exclude
+    :return: List of activities
+    """
+    if patterns:
+        selected = []
+        for pattern in patterns:
+            matches = [
+                activity for activity in activities if _match(activity, pattern, regex)
+            ]
+            if not matches:
+                raise ValueError("No activity exist with the name: {}".format(pattern))
+            selected.extend(
+                activity for activity in matches if activity not in selected
+            )
+    else:
+        selected = list(activities)
+
+    if all_except:
+        excluded = {activity.id for activity in select(activities, all_except, regex)}
+        selected = [activity for activity in selected if activity.id not in excluded]
+
+    return selected
+
+
+def transition(
+    bus,
+    activities,
+    method,
+    signal="ActivityStateChanged",
+    state=None,
+    timeout=5.0,
+    workers=8,
+):
+    """
+    Concurrently call a method on several activities and wait for the result
+
+    The calls are dispatched from a pool of threads on the shared connection.
+    Completion is detected with the `signal` emitted by the activity manager
+    (with `state` as second argument when given), activities already in
+    `state` are skipped.
+
+    :param bus: Proxy dbus object to 'org.kde.ActivityManager
+    /ActivityManager/Activities'
+    :param activities: List of activities
+    :param method: Name of the method called with the id of each activity
+    :param signal: Name of the signal marking the completion
+    :param state: Expected state in the signal
+    :param timeout: Seconds to wait for the signals
+    :param workers: Maximum number of concurrent calls
+    :return: Mapping of activity id to None on success or an error message
+    """
+    return _Transition(bus, method, signal, state).run(activities, timeout, workers)
+
+
+class _Transition(object):
+    def __init__(self, bus, method, signal, state):
+        from gi.repository import GLib
+
+        self._glib = GLib
+        self._bus = bus
+        self._method = method
+        self._signal = signal
+        self._state = state
+        self._loop = GLib.MainLoop()
+        self._timer = None
+        self._pending = set()
+        self._results = {}
+
+    def run(self, activities, timeout, workers):
+        self._results = {activity.id: "Timeout" for activity in activities}
+        self._pending = set(self._results)
+
+        subscription = getattr(self._bus, self._signal).connect(self._on_signal)
+        pool = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+        try:
+            for activity in activities:
+                pool.submit(self._call, activity)
+
+            if self._pending:
+                self._timer = self._glib.timeout_add(int(timeout * 1000), self._expire)
+                self._loop.run()
+                if self._timer is not None:
+                    self._glib.source_remove(self._timer)
+        finally:
+            pool.shutdown(wait=False)
+            subscription.disconnect()
+
+        if self._state is not None:
+            for activity in activities:
+                if self._results[activity.id] is None:
+                    activity._state = self._state
+        return self._results
+
+    def _call(self, activity):
+        # Executed in the threads of the pool
+        try:
+            if self._state is not None:
+                if activity._state is None:
+                    activity._state = self._bus.ActivityState(activity.id)
+                if activity._state == self._state:
+                    self._glib.idle_add(self._done, activity.id)
+                    return
+            getattr(self._bus, self._method)(activity.id)
+        except Exception as e:
+            self._glib.idle_add(self._done, activity.id, str(e) or type(e).__name__)
+
+    def _on_signal(self, activity_id, *args):
+        if self._state is None or (args and args[0] == self._state):
+            self._done(activity_id)
+
+    def _done(self, activity_id, error=None):
+        if activity_id in self._pending:
+            self._pending.discard(activity_id)
+            self._results[activity_id] = error
+        if not self._pending:
+            self._loop.quit()
+        return False
+
+    def _expire(self):
+        self._timer = None
+        self._loop.quit()
+        return False
+
+
+def _match(activity, pattern, regex):
+    if regex:
+        return re.fullmatch(pattern, activity.name) is not None
+    if is_pattern(pattern):
+        return fnmatch.fnmatchcase(activity.name, pattern)
+    return pattern in (activity.name, activity.id)
@@ -0,0 +1,169 @@
+import os
+import sys
+import json
+import time
+import signal
+import threading
+import subprocess
+import concurrent.futures
+
+from .hooks import HookIndex
+
+ACTIONS_BY_STATE = {2: "started", 4: "stopped"}
+
+
+def default_path():
+    """
+    Default root of the hook scripts run by `pytivity watch`
+
+    It is distinct from the kactivitymanagerd scripts directory so the
+    commands are not executed twice.
+
+    :return: `$XDG_CONFIG_HOME/pytivity/hooks`
+    """
+    from xdg.BaseDirectory import xdg_config_home
+
+    return os.path.join(xdg_config_home, "pytivity/hooks")
+
+
+class HookExecutor(object):
+    """
+    Executor of the activities hook commands
+
+    Every `.desktop` script of `<path>/<id>/<action>/` is executed in a
+    bounded pool of workers, scripts of the same action run in parallel.
+    One JSON object describing the result of each command is written to
+    `log`.
+
+    Args:
+        path (str): Root of the hook scripts directory tree
+        workers (int): Maximum number of commands running at the same time
+        timeout (float): Seconds after which a command is killed
+        log: Text file object receiving the results, None to discard them
+    """
+
+    def __init__(self, path, workers=4, timeout=30, log=sys.stdout):
+        self.timeout = timeout
+        self._index = HookIndex(path)
+        self._log = log
+        self._lock = threading.Lock()
+        self._pool = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+
+    def run(self, activity_id, action):
+        """
+        Execute the commands of an activity action
+
+        :param activity_id: Id of the activity
+        :param action: `activated`, `deactivated`, `started` or `stopped`
+        :return: List of futures resolving to the results
+        """
+        return [
+            self._pool.submit(self._execute, activity_id, action, script, command)
+            for script, command in sorted(
+                self._index.commands(activity_id, action).items()
+            )
+            if command
+        ]
+
+    def close(self, wait=True):
+        """
+        Stop the executor
+
+        :param wait: Wait for the running commands
+        :return: None
+        """
+        self._pool.shutdown(wait=wait)
+
+    def _execute(self, activity_id, action, script, command):
+        result = {
+            "time": time.time(),
+            "activity": activity_id,
+            "action": action,
+            "script": script,
+            "command": command,
+            "returncode": None,
+            "timed_out": False,
+        }
+
+        start = time.perf_counter()
+        try:
+            returncode, stderr = _run(command, self.timeout)
+        except subprocess.TimeoutExpired:
+            result["timed_out"] = True
+        except OSError as e:
+            result["error"] = str(e)
+        else:
+            result["returncode"] = returncode
+            if returncode:
+                result["stderr"] = stderr.decode(errors="replace")[-1000:]
+        result["duration"] = time.perf_counter() - start
+
+        if self._log is not None:
+            with self._lock:
+                self._log.write(json.dumps(result) + "\n")
+                self._log.flush()
+        return result
+
+
+def _run(command, timeout):
+    # The command runs in its own session so the processes it starts are
+    # killed with the shell on timeout
+    process = subprocess.Popen(
+        command,
+        shell=True,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        start_new_session=True,
+    )
+    try:
+        _, stderr = process.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        process.communicate()
+        raise
+    return process.returncode, stderr
+
+
+def watch(bus, executor):
+    """
+    Execute the hook commands on activity changes until interrupted
+
+    :param bus: Proxy dbus object to 'org.kde.ActivityManager
+    /ActivityManager/Activities'
+    :param executor: `HookExecutor`
+    :return: None
+    """
+    from gi.repository import GLib
+
+    current = bus.CurrentActivity()
+
+    def on_state_changed(activity_id, state):
+        action = ACTIONS_BY_STATE.get(state)
+        if action:
+            executor.run(activity_id, action)
+
+    def on_current_changed(activity_id):
+        nonlocal current
+        if current and current != activity_id:
+            executor.run(current, "deactivated")
+        executor.run(activity_id, "activated")
+        current = activity_id
+
+    subscriptions = [
+        bus.ActivityStateChanged.connect(on_state_changed),
+        bus.CurrentActivityChanged.connect(on_current_changed),
+    ]
+
+    loop = GLib.MainLoop()
+    try:
+        loop.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for subscription in subscriptions:
+            subscription.disconnect()
+        executor.close()
@@ -22,6 +22,7 @@ setup(
     include_package_data=True,
     zip_safe=False,
     install_requires=["terminaltables", "pyxdg", "pydbus"],
+    extras_require={"async": ["dbus-next"]},
     tests_require=["flake8"],
     classifiers=[
         "License :: OSI Approved :: MIT License",
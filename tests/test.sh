@@ -6,6 +6,8 @@ flake8 pytivity setup.py
 black --check --diff pytivity setup.py
 isort --recursive --check-only pytivity setup.py
 mypy pytivity/
+python -m unittest discover -s tests
+python benchmarks/startup.py
 # sphinx-build docs/ docs/_build -W
 python setup.py sdist
 python setup.py bdist_wheel
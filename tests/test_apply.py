@@ -0,0 +1,92 @@
+import os
+import json
+import types
+import tempfile
+import unittest
+import importlib.util
+from unittest import mock
+
+from pytivity import apply
+
+
+def activity(name, **fields):
+    values = dict.fromkeys(apply.FIELDS, "")
+    values.update(fields)
+    return types.SimpleNamespace(name=name, **values)
+
+
+class PlanTest(unittest.TestCase):
+    def test_create(self):
+        changes = apply.plan([{"name": "Work", "icon": "work"}], [])
+        self.assertEqual(
+            changes, [apply.Change("create", "Work", None, {"icon": ("", "work")})]
+        )
+
+    def test_update(self):
+        work = activity("Work", icon="work", started="old")
+        changes = apply.plan(
+            [{"name": "Work", "icon": "work", "started": "new", "stopped": None}],
+            [work],
+        )
+        self.assertEqual(
+            changes,
+            [apply.Change("update", "Work", work, {"started": ("old", "new")})],
+        )
+
+    def test_up_to_date(self):
+        spec = [{"name": "Work", "icon": "work", "activated": ""}]
+        self.assertEqual(apply.plan(spec, [activity("Work", icon="work")]), [])
+
+    def test_omitted_fields_untouched(self):
+        spec = [{"name": "Work"}]
+        self.assertEqual(apply.plan(spec, [activity("Work", icon="work")]), [])
+
+    def test_first_activity_of_a_name(self):
+        first, second = activity("Work"), activity("Work")
+        changes = apply.plan([{"name": "Work", "icon": "work"}], [first, second])
+        self.assertIs(changes[0].activity, first)
+
+    def test_duplicate_names(self):
+        spec = [{"name": "Work"}, {"name": "Games"}, {"name": "Work", "icon": "x"}]
+        with self.assertRaisesRegex(ValueError, "Work"):
+            apply.plan(spec, [])
+
+
+class LoadSpecTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, "w") as f:
+            f.write(content)
+        return path
+
+    def test_json(self):
+        path = self.write("spec.json", json.dumps({"activities": [{"name": "W"}]}))
+        self.assertEqual(apply.load_spec(path), [{"name": "W"}])
+
+    def test_invalid(self):
+        for content in ("{", '[{"icon": "x"}]', '[{"name": "W", "color": "x"}]', "1"):
+            with self.subTest(content=content):
+                with self.assertRaises(ValueError):
+                    apply.load_spec(self.write("spec.json", content))
+
+    @unittest.skipIf(importlib.util.find_spec("yaml") is None, "requires PyYAML")
+    def test_yaml(self):
+        path = self.write("spec.yaml", "- name: Work\n  icon: work\n")
+        self.assertEqual(apply.load_spec(path), [{"name": "Work", "icon": "work"}])
+        with self.assertRaises(ValueError):
+            apply.load_spec(self.write("spec.yml", "- name: [Work\n"))
+
+    def test_yaml_without_pyyaml(self):
+        path = self.write("spec.yaml", "- name: Work\n")
+        with mock.patch.dict("sys.modules", {"yaml": None}):
+            with self.assertRaisesRegex(ValueError, "PyYAML"):
+                apply.load_spec(path)
+
+
+if __name__ == "__main__":
+    unittest.main()
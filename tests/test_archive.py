@@ -0,0 +1,54 @@
+import io
+import unittest
+
+from pytivity import archive
+
+
+class Bus(object):
+    def __init__(self):
+        self.calls = []
+
+    def AddActivity(self, name):
+        self.calls.append(("AddActivity", name))
+        return "id-{}".format(name)
+
+    def __getattr__(self, method):
+        return lambda *args: self.calls.append((method,) + args)
+
+
+class ImportTest(unittest.TestCase):
+    def test_import(self):
+        f = io.StringIO(
+            '{"name": "Work", "icon": "work", "state": "Stopped"}\n'
+            "\n"
+            '{"name": "Games", "state": "Started"}\n'
+            '{"name": "Old"}\n'
+        )
+        bus = Bus()
+        imported = list(archive.import_activities(f, bus, existing=["Old"]))
+        self.assertEqual(
+            imported, [("Work", "id-Work"), ("Games", "id-Games"), ("Old", None)]
+        )
+        self.assertEqual(
+            bus.calls,
+            [
+                ("AddActivity", "Work"),
+                ("SetActivityIcon", "id-Work", "work"),
+                ("StopActivity", "id-Work"),
+                ("AddActivity", "Games"),
+                ("StartActivity", "id-Games"),
+            ],
+        )
+
+    def test_invalid_records(self):
+        for line in ("{", "[]", '{"id": "a1"}', '{"name": "A", "scripts": []}'):
+            with self.subTest(line=line):
+                f = io.StringIO('{"name": "Work"}\n\n' + line + "\n")
+                records = archive.import_activities(f, Bus())
+                self.assertEqual(next(records), ("Work", "id-Work"))
+                with self.assertRaisesRegex(ValueError, "line 3"):
+                    next(records)
+
+
+if __name__ == "__main__":
+    unittest.main()
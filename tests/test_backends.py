@@ -0,0 +1,120 @@
+import os
+import tempfile
+import unittest
+
+from pytivity import backends
+
+RC = """
+[activities]
+a1=Work
+a2=Games\\sand\\tfun
+a3=Old
+
+[activities-descriptions]
+a1=Daily\\njob
+a1[fr]=Travail
+
+[activities-icons]
+a2=applications-games
+
+[main]
+currentActivity=a2
+runningActivities=a1, a2
+"""
+
+
+class ParseTest(unittest.TestCase):
+    def test_groups(self):
+        groups = backends.parse("top=1\n# comment\n\n[a]\nk = v\n[b]\nk=w\n")
+        self.assertEqual(groups, {"": {"top": "1"}, "a": {"k": "v"}, "b": {"k": "w"}})
+
+    def test_repeated_group(self):
+        groups = backends.parse("[a]\nx=1\n[b]\n[a]\ny=2\n")
+        self.assertEqual(groups["a"], {"x": "1", "y": "2"})
+
+    def test_lines_without_value(self):
+        self.assertEqual(backends.parse("[a]\ninvalid\n"), {"": {}, "a": {}})
+
+    def test_localized_entries(self):
+        groups = backends.parse("[a]\nname=Work\nname[fr]=Travail\n")
+        self.assertEqual(groups["a"], {"name": "Work"})
+
+    def test_flags(self):
+        groups = backends.parse("[a]\npath[$e]=$HOME\n")
+        self.assertEqual(groups["a"], {"path": "$HOME"})
+
+    def test_value_with_separator(self):
+        self.assertEqual(backends.parse("a=b=c\n")[""], {"a": "b=c"})
+
+
+class UnescapeTest(unittest.TestCase):
+    def test_plain(self):
+        self.assertEqual(backends._unescape("Work"), "Work")
+
+    def test_escapes(self):
+        self.assertEqual(backends._unescape(r"a\sb\tc\nd\re\\f"), "a b\tc\nd\re\\f")
+
+    def test_hexadecimal(self):
+        self.assertEqual(backends._unescape(r"\x41\x3d"), "A=")
+
+    def test_unknown_escape(self):
+        self.assertEqual(backends._unescape(r"\q"), "q")
+
+    def test_trailing_backslash(self):
+        self.assertEqual(backends._unescape("a\\"), "a\\")
+
+
+class FileBackendTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "kactivitymanagerdrc")
+        with open(self.path, "w") as f:
+            f.write(RC)
+        self.backend = backends.FileBackend(self.path)
+
+    def test_list(self):
+        self.assertEqual(
+            sorted(self.backend.ListActivitiesWithInformation()),
+            [
+                ("a1", "Work", "Daily\njob", "", 2),
+                ("a2", "Games and\tfun", "", "applications-games", 2),
+                ("a3", "Old", "", "", 4),
+            ],
+        )
+        self.assertEqual(sorted(self.backend.ListActivities(4)), ["a3"])
+        self.assertEqual(self.backend.CurrentActivity(), "a2")
+
+    def test_unknown_activity(self):
+        self.assertEqual(self.backend.ActivityName("a4"), "")
+        self.assertEqual(self.backend.ActivityState("a4"), backends.INVALID_STATE)
+
+    def test_every_activity_running_by_default(self):
+        with open(self.path, "w") as f:
+            f.write("[activities]\na1=Work\na2=Games\n")
+        self.assertEqual(sorted(self.backend.ListActivities(2)), ["a1", "a2"])
+
+    def test_refresh(self):
+        self.assertEqual(self.backend.ActivityName("a1"), "Work")
+        with open(self.path, "w") as f:
+            f.write("[activities]\na1=Job\n")
+        self.assertEqual(self.backend.ActivityName("a1"), "Work")
+        self.backend.refresh()
+        self.assertEqual(self.backend.ActivityName("a1"), "Job")
+
+    def test_missing_file(self):
+        backend = backends.FileBackend(self.path + ".missing")
+        with self.assertRaises(ValueError):
+            backend.ListActivities()
+
+    def test_same_file_same_backend(self):
+        self.assertEqual(self.backend, backends.FileBackend(self.path))
+        self.assertEqual(hash(self.backend), hash(backends.FileBackend(self.path)))
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            backends.backend("unknown")
+
+
+if __name__ == "__main__":
+    unittest.main()
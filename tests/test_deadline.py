@@ -0,0 +1,57 @@
+import unittest
+
+from pytivity import deadline
+
+
+class DurationTest(unittest.TestCase):
+    def test_units(self):
+        self.assertEqual(deadline.duration("500ms"), 0.5)
+        self.assertEqual(deadline.duration("2s"), 2.0)
+        self.assertEqual(deadline.duration("1.5"), 1.5)
+        self.assertEqual(deadline.duration(".25s"), 0.25)
+        self.assertEqual(deadline.duration(" 30 ms "), 0.03)
+
+    def test_invalid(self):
+        for value in ("", "0", "0ms", "-1s", "1m", "ms", "1.5.2s", "fast"):
+            with self.subTest(value=value):
+                with self.assertRaises(ValueError):
+                    deadline.duration(value)
+
+    def test_format(self):
+        self.assertEqual(deadline.format_duration(0.25), "250ms")
+        self.assertEqual(deadline.format_duration(2), "2s")
+        self.assertEqual(deadline.format_duration(1.5), "1.5s")
+
+    def test_exceeded_message(self):
+        error = deadline.DeadlineExceeded("Activities.SetCurrentActivity", 0.3)
+        self.assertIsInstance(error, TimeoutError)
+        self.assertEqual(
+            str(error),
+            "Activities.SetCurrentActivity did not complete within the 300ms deadline",
+        )
+
+
+class DeadlineTest(unittest.TestCase):
+    def test_spent(self):
+        budget = deadline.Deadline(0)
+        self.assertEqual(budget.remaining(), 0)
+        with self.assertRaises(deadline.DeadlineExceeded):
+            budget.check("operation")
+
+    def test_remaining(self):
+        budget = deadline.Deadline(60)
+        self.assertTrue(0 < budget.check("operation") <= 60)
+
+
+class DeadlineProxyTest(unittest.TestCase):
+    def test_same_as_wrapped_proxy(self):
+        proxy = object()
+        wrapped = deadline.Deadline(1).wrap(proxy, "Activities")
+        self.assertEqual(wrapped, proxy)
+        self.assertEqual(wrapped, deadline.Deadline(2).wrap(proxy, "Activities"))
+        self.assertEqual(hash(wrapped), hash(proxy))
+        self.assertEqual({proxy: 1}[wrapped], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
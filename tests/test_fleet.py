@@ -0,0 +1,93 @@
+import os
+import tempfile
+import unittest
+import subprocess
+from unittest import mock
+
+from pytivity import fleet
+
+
+class StripOptionsTest(unittest.TestCase):
+    def test_options_with_values(self):
+        argv = ["--fleet", "/run/user/1000", "--fleet-workers", "4", "list"]
+        self.assertEqual(fleet.strip_options(argv), ["list"])
+
+    def test_options_without_value(self):
+        argv = ["--fleet-json", "start", "Work"]
+        self.assertEqual(fleet.strip_options(argv), ["start", "Work"])
+
+    def test_inline_values(self):
+        argv = ["--fleet=/run/user/1000", "--fleet-workers=4", "stop", "Work"]
+        self.assertEqual(fleet.strip_options(argv), ["stop", "Work"])
+
+    def test_other_options_kept(self):
+        argv = ["--trace", "t.json", "--fleet", "bus", "list", "--format", "jsonl"]
+        self.assertEqual(
+            fleet.strip_options(argv),
+            ["--trace", "t.json", "list", "--format", "jsonl"],
+        )
+
+    def test_values_like_options(self):
+        argv = ["--fleet", "--fleet-json", "activate", "--fleet-json"]
+        self.assertEqual(fleet.strip_options(argv), ["activate"])
+
+
+class ResolveTest(unittest.TestCase):
+    def test_address(self):
+        target = fleet.resolve("unix:path=/tmp/bus")
+        self.assertEqual(target.env["DBUS_SESSION_BUS_ADDRESS"], "unix:path=/tmp/bus")
+        self.assertIsNone(target.uid)
+        self.assertEqual(target.options, ["--no-daemon", "--no-name-cache"])
+
+    def test_runtime_directory(self):
+        with tempfile.TemporaryDirectory() as directory:
+            target = fleet.resolve(directory)
+        self.assertEqual(
+            target.env["DBUS_SESSION_BUS_ADDRESS"],
+            "unix:path={}".format(os.path.join(directory, "bus")),
+        )
+        self.assertEqual(target.env["XDG_RUNTIME_DIR"], directory)
+        self.assertIsNone(target.uid)
+        self.assertEqual(target.options, ["--no-daemon"])
+
+    def test_runtime_directory_of_another_user(self):
+        with tempfile.TemporaryDirectory() as directory:
+            uid = os.stat(directory).st_uid + 1
+            with mock.patch("os.getuid", return_value=uid):
+                with mock.patch("os.geteuid", return_value=uid):
+                    with self.assertRaises(ValueError):
+                        fleet.resolve(directory)
+
+
+class RunTest(unittest.TestCase):
+    def test_failed_target(self):
+        def run(argv, env, **kwargs):
+            if env["DBUS_SESSION_BUS_ADDRESS"] == "bad":
+                raise subprocess.SubprocessError("Exception occurred in preexec_fn.")
+            return subprocess.CompletedProcess(argv, 0, "done")
+
+        targets = [fleet.resolve("bad"), fleet.resolve("good")]
+        with mock.patch("subprocess.run", run):
+            results = {
+                result.target.name: result for result in fleet.run(targets, ["list"])
+            }
+        self.assertEqual(results["bad"].status, 1)
+        self.assertEqual(results["bad"].output, "Exception occurred in preexec_fn.")
+        self.assertEqual(results["good"].status, 0)
+        self.assertEqual(results["good"].output, "done")
+
+
+class ListRowsTest(unittest.TestCase):
+    def test_rows(self):
+        target = fleet.resolve("bus")
+        results = [
+            fleet.Result(target, 0, '{"id": "a1", "name": "Work"}\n{"id": "a2"}\n')
+        ]
+        self.assertEqual(
+            list(fleet.list_rows(results, ["id", "name"])),
+            [["bus", "a1", "Work"], ["bus", "a2", ""]],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
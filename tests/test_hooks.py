@@ -0,0 +1,75 @@
+import os
+import tempfile
+import unittest
+
+from pytivity import hooks
+
+
+class WriteScriptsTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = directory.name
+
+    def read(self, action, name):
+        with open(os.path.join(self.path, "a1", action, name)) as f:
+            return f.read()
+
+    def test_write(self):
+        changed = hooks.write_scripts(
+            self.path,
+            "a1",
+            {"started": {"Work.desktop": "start"}, "stopped": {"Work.desktop": "stop"}},
+        )
+        self.assertEqual(changed, {"started", "stopped"})
+        self.assertEqual(self.read("started", "Work.desktop"), "start")
+        self.assertEqual(self.read("stopped", "Work.desktop"), "stop")
+        self.assertEqual(
+            os.listdir(os.path.join(self.path, "a1", "started")), ["Work.desktop"]
+        )
+
+    def test_unchanged_content(self):
+        scripts = {"started": {"Work.desktop": "start"}}
+        hooks.write_scripts(self.path, "a1", scripts)
+        self.assertEqual(hooks.write_scripts(self.path, "a1", scripts), set())
+        scripts = {"started": {"Work.desktop": "start again"}}
+        self.assertEqual(hooks.write_scripts(self.path, "a1", scripts), {"started"})
+        self.assertEqual(self.read("started", "Work.desktop"), "start again")
+
+    def test_remove(self):
+        hooks.write_scripts(self.path, "a1", {"started": {"Work.desktop": "start"}})
+        changed = hooks.write_scripts(
+            self.path, "a1", {"started": {"Work.desktop": None}}
+        )
+        self.assertEqual(changed, {"started"})
+        self.assertEqual(os.listdir(os.path.join(self.path, "a1", "started")), [])
+
+    def test_remove_missing(self):
+        changed = hooks.write_scripts(
+            self.path, "a1", {"started": {"Work.desktop": None}}
+        )
+        self.assertEqual(changed, set())
+        self.assertFalse(os.path.exists(os.path.join(self.path, "a1")))
+
+    def test_prepare(self):
+        hooks.write_scripts(self.path, "a1", {}, prepare=hooks.ACTIONS)
+        self.assertEqual(
+            sorted(os.listdir(os.path.join(self.path, "a1"))), sorted(hooks.ACTIONS)
+        )
+
+    def test_file_name_stays_in_action_directory(self):
+        hooks.write_scripts(self.path, "a1", {"started": {"../Work.desktop": "start"}})
+        self.assertEqual(self.read("started", "Work.desktop"), "start")
+
+    def test_read_back(self):
+        hooks.write_scripts(
+            self.path,
+            "a1",
+            {"started": {"Work.desktop": "[Desktop Entry]\nExec=run\n"}},
+        )
+        index = hooks.HookIndex(self.path)
+        self.assertEqual(index.command("a1", "started", "Work"), "run")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+
+from pytivity.index import NameIndex, AmbiguousName
+
+
+class ResolveTest(unittest.TestCase):
+    def setUp(self):
+        self.index = NameIndex(
+            {"Work": "1", "work": "2", "Workshop": "3", "Games": "4", "Gardening": "5"}
+        )
+
+    def test_exact_name(self):
+        self.assertEqual(self.index.resolve("work"), "work")
+        self.assertEqual(self.index.match("Work"), "1")
+
+    def test_case_insensitive_name(self):
+        index = NameIndex({"Work": "1", "Workshop": "3"})
+        self.assertEqual(index.resolve("WORK"), "Work")
+
+    def test_case_insensitive_name_ambiguous(self):
+        with self.assertRaises(AmbiguousName) as context:
+            self.index.resolve("WORK")
+        self.assertEqual(sorted(context.exception.names), ["Work", "work"])
+
+    def test_prefix(self):
+        self.assertEqual(self.index.resolve("works"), "Workshop")
+        self.assertEqual(self.index.match("gam"), "4")
+
+    def test_prefix_ambiguous(self):
+        with self.assertRaises(AmbiguousName) as context:
+            self.index.resolve("ga")
+        self.assertEqual(sorted(context.exception.names), ["Games", "Gardening"])
+        self.assertEqual(context.exception.query, "ga")
+
+    def test_abbreviation(self):
+        self.assertEqual(self.index.resolve("gdn"), "Gardening")
+        self.assertEqual(self.index.resolve("wsp"), "Workshop")
+
+    def test_abbreviation_ambiguous(self):
+        with self.assertRaises(AmbiguousName):
+            self.index.resolve("ge")
+
+    def test_same_id_is_not_ambiguous(self):
+        index = NameIndex({"Work": "1", "WORK": "1"})
+        self.assertEqual(index.match("work"), "1")
+
+    def test_unknown(self):
+        self.assertIsNone(self.index.resolve("xyz"))
+        self.assertIsNone(self.index.match("xyz"))
+        self.assertIsNone(self.index.resolve(""))
+
+    def test_exact_only(self):
+        self.assertEqual(self.index.resolve("Workshop", fuzzy=False), "Workshop")
+        self.assertIsNone(self.index.resolve("works", fuzzy=False))
+        self.assertIsNone(self.index.resolve("WORK", fuzzy=False))
+        self.assertIsNone(self.index.match("gdn", fuzzy=False))
+
+    def test_updates(self):
+        self.index.add("Music", "6")
+        self.assertEqual(self.index.match("mus"), "6")
+        self.index.rename("6", "Audio")
+        self.assertIsNone(self.index.resolve("mus"))
+        self.assertEqual(self.index.match("aud"), "6")
+        self.index.remove("4")
+        self.assertEqual(self.index.resolve("ga"), "Gardening")
+
+    def test_first_name_added_is_kept(self):
+        index = NameIndex()
+        index.add("Work", "1")
+        index.add("Work", "2")
+        self.assertEqual(index.get("Work"), "1")
+
+
+if __name__ == "__main__":
+    unittest.main()
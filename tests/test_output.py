@@ -0,0 +1,52 @@
+import io
+import json
+import unittest
+
+from pytivity import output
+
+
+class QuoteTest(unittest.TestCase):
+    def test_plain(self):
+        self.assertEqual(output._quote("Work"), "Work")
+        self.assertEqual(output._quote(""), "")
+
+    def test_separator(self):
+        self.assertEqual(output._quote("a, b"), '"a, b"')
+
+    def test_quotes(self):
+        self.assertEqual(output._quote('say "hi"'), '"say ""hi"""')
+
+    def test_new_line(self):
+        self.assertEqual(output._quote("a\nb"), '"a\nb"')
+
+
+class WriteTest(unittest.TestCase):
+    columns = ["id", "name"]
+    data = [["a1", "Work"], ["a2", "Games, fun"]]
+
+    def write(self, format, **kwargs):
+        f = io.StringIO()
+        count = output.write(iter(self.data), self.columns, format, f, **kwargs)
+        self.assertEqual(count, 2)
+        return f.getvalue()
+
+    def test_raw(self):
+        self.assertEqual(self.write("raw"), 'a1, Work\na2, "Games, fun"\n')
+
+    def test_jsonl(self):
+        lines = self.write("jsonl").splitlines()
+        self.assertEqual(
+            [json.loads(line) for line in lines],
+            [{"id": "a1", "name": "Work"}, {"id": "a2", "name": "Games, fun"}],
+        )
+
+    def test_csv(self):
+        self.assertEqual(self.write("csv"), 'ID,Name\na1,Work\na2,"Games, fun"\n')
+        self.assertEqual(self.write("csv", header=False), 'a1,Work\na2,"Games, fun"\n')
+
+    def test_tsv(self):
+        self.assertEqual(self.write("tsv"), "ID\tName\na1\tWork\na2\tGames, fun\n")
+
+
+if __name__ == "__main__":
+    unittest.main()